@@ -0,0 +1,86 @@
+"""
+Benchmark of the ChordIsolator verdict cache policies.
+
+Run with `python -m benchmarks.bench_cache`
+"""
+
+import random
+import time
+from chordal_wip.cache import VerdictCache, LRUCache, SLRUCache
+from chordal_wip.chordisolator import ChordIsolator
+
+ROOTS = ["C", "C#", "Db", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]
+SUFFIXES = ["", "m", "7", "m7", "maj7", "sus4", "sus2", "dim", "add9", "6"]
+
+# Junk spelled with chord characters only, so the charset filter lets it reach the cache
+JUNK_PIECES = [
+    "bb",
+    "#b",
+    "sus7",
+    "add",
+    "dim",
+    "mM",
+    "aug",
+    "13",
+    "+-",
+    "1",
+    "5",
+]
+
+
+def synthetic_tokens(n_tokens=500_000, junk_share=0.3, seed=0):
+    """Zipf-distributed chords mixed with mostly one-off junk tokens, e.g. "Cbbadd13dim" """
+    rng = random.Random(seed)
+    chords = [root + suffix for suffix in SUFFIXES for root in ROOTS]
+    weights = [1 / rank for rank in range(1, len(chords) + 1)]
+
+    tokens = []
+    for i in range(n_tokens):
+        if rng.random() < junk_share:
+            pieces = rng.choices(JUNK_PIECES, k=rng.randint(3, 6))
+            tokens.append(rng.choice(ROOTS) + "".join(pieces))
+        else:
+            tokens.append(rng.choices(chords, weights)[0])
+    return tokens
+
+
+def run(cache, tokens) -> dict:
+    # Without accept table, so every chord goes through the cache
+    iso = ChordIsolator(cache=cache, accept_table=[])
+
+    start = time.perf_counter()
+    iso._process_tokens(tokens)
+    elapsed = time.perf_counter() - start
+
+    stats = iso.cache_stats()
+    stats["seconds"] = round(elapsed, 3)
+    stats["tokens_per_sec"] = round(len(tokens) / elapsed)
+    stats["hit_rate"] = round(stats["hits"] / len(tokens), 3)
+    return stats
+
+
+# Benchmarks ----
+def bench_unbounded(tokens):
+    return run(VerdictCache(), tokens)
+
+
+def bench_lru(tokens, max_entries=10_000):
+    return run(LRUCache(max_entries=max_entries), tokens)
+
+
+def bench_lru_bytes(tokens, max_bytes=1_000_000):
+    return run(LRUCache(max_bytes=max_bytes), tokens)
+
+
+def bench_slru(tokens, max_entries=10_000):
+    return run(SLRUCache(max_entries=max_entries), tokens)
+
+
+BENCHMARKS = [bench_unbounded, bench_lru, bench_lru_bytes, bench_slru]
+
+
+if __name__ == "__main__":
+    tokens = synthetic_tokens()
+
+    for bench in BENCHMARKS:
+        print(f"{bench.__name__}: {bench(tokens)}")
@@ -0,0 +1,138 @@
+"""
+Chords per second of the table-driven chord parser of ChordCanonizer against the former
+SPLIT_REGEX parser, on the chord spellings of the synthetic corpus (memo bypassed).
+
+Run with `python -m benchmarks.bench_chord_parser`
+"""
+
+import random
+import re
+import time
+from benchmarks.corpus import annotated_chords
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordparts import ChordParts
+
+
+class RegexChordCanonizer(ChordCanonizer):
+    """ChordCanonizer with the regex parser it had before the table-driven scanner"""
+
+    SPLIT_REGEX = re.compile(
+        r"""
+        \([^)]*\)
+        |sus(?:2|4)?
+        |add(?:2|4|5|6|7|9|11|13){1}[#b+-]?
+        |maj|M
+        |dim
+        |aug|\+
+        |m|min|-
+        |[#b]?(?:2|4|5|6|7|9|11|13){1}[+-]?
+        """,
+        re.VERBOSE,
+    )
+
+    def _decompose(self, chord: str) -> ChordParts:
+        quality = None
+        adds = []
+        sus = None
+        extensions = []
+        slash = None
+        unclear = []
+
+        chord = chord.replace("(", "").replace(")", "")
+        tokens = []
+
+        if "/" in chord:
+            parts = chord.split("/")
+            chord = "".join(parts[0:-1])
+            slash_bass_candidate = parts[-1]
+
+            if self.ROOT_REGEX.match(slash_bass_candidate):
+                slash = slash_bass_candidate
+            else:
+                tokens.append(slash_bass_candidate)
+
+        root_capture = self.ROOT_REGEX.match(chord)
+
+        if not root_capture:
+            return ChordParts(slash=slash)
+
+        root = root_capture.group(0)
+        remainder = chord[len(root) :]
+        tokens = tokens + self.SPLIT_REGEX.findall(remainder)
+
+        for token in tokens:
+            token = token.strip()
+
+            if token.startswith("add"):
+                adds.append(token)
+            elif token.startswith("sus"):
+                sus = self.ALLOWED_QUALITIES[token]
+            elif token in self.ALLOWED_QUALITIES:
+                quality = self.ALLOWED_QUALITIES[token]
+            elif self.EXTENSIONS_REGEX.match(token):
+                extensions.append(token)
+            else:
+                unclear.append(token)
+
+        return ChordParts(
+            root=root,
+            quality=quality,
+            adds=tuple(adds),
+            sus=sus,
+            extensions=tuple(extensions),
+            slash=slash,
+            unclear=tuple(unclear),
+        )
+
+    def _num_sort(self, txt: str):
+        numb = re.search(r"\d+", txt)
+
+        if numb:
+            return int(numb.group())
+
+        return 999
+
+
+def chord_sample(n=50_000, seed=0) -> list:
+    """Annotated chords, transposed to every root so the parser sees varied spellings"""
+    rng = random.Random(seed)
+    chords = annotated_chords()
+    roots = [f"{note}{acc}" for note in "ABCDEFG" for acc in ("", "#", "b")]
+
+    return [
+        rng.choice(roots) + re.sub(r"^[A-G][#b]?", "", rng.choice(chords))
+        for _ in range(n)
+    ]
+
+
+def bench_parser(cc: ChordCanonizer, chords: list) -> dict:
+    """Seconds to decompose, and to decompose, normalize and reconstruct, every chord"""
+    start = time.perf_counter()
+    for chord in chords:
+        cc._decompose(chord)
+    decompose = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for chord in chords:
+        cc._reconstruct(cc._normalize(cc._decompose(chord)))
+    canonicalize = time.perf_counter() - start
+
+    return {
+        "parser": type(cc).__name__,
+        "decompose_seconds": round(decompose, 3),
+        "canonicalize_seconds": round(canonicalize, 3),
+        "chords_per_sec": round(len(chords) / canonicalize),
+    }
+
+
+if __name__ == "__main__":
+    chords = chord_sample()
+
+    # Both parsers must agree before timing them
+    table, regex = ChordCanonizer(), RegexChordCanonizer()
+    for chord in chords:
+        assert table._decompose(chord) == regex._decompose(chord), chord
+
+    # Fresh instances, the scanner starts without any scanned remainder
+    for cls in (RegexChordCanonizer, ChordCanonizer):
+        print(bench_parser(cls(), chords))
@@ -0,0 +1,38 @@
+"""
+Tokens per second of the ChordIsolator "pipeline" and "fused" engines.
+
+Run with `python -m benchmarks.bench_isolator_engines`
+"""
+
+import time
+from benchmarks.corpus import synthetic_corpus
+from chordal_wip.chordisolator import ChordIsolator
+
+
+def bench_engine(engine: str, songs: list, warm=False) -> dict:
+    iso = ChordIsolator(engine=engine)
+    if warm:
+        for song in songs:
+            iso.raw_chord_isolation(song)
+
+    n_tokens = sum(len(song.split()) for song in songs)
+
+    start = time.perf_counter()
+    for song in songs:
+        iso.raw_chord_isolation(song)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "engine": engine,
+        "cache": "warm" if warm else "cold",
+        "seconds": round(elapsed, 3),
+        "tokens_per_sec": round(n_tokens / elapsed),
+    }
+
+
+if __name__ == "__main__":
+    songs = synthetic_corpus(2_000)
+
+    for warm in (False, True):
+        for engine in ChordIsolator.ENGINES:
+            print(bench_engine(engine, songs, warm=warm))
@@ -0,0 +1,214 @@
+"""
+Throughput benchmark of isolate -> canonicalize -> key prediction.
+
+Every stage runs in a fresh process, so its peak RSS is not polluted by the other stages.
+Results are written as JSON to compare runs.
+
+Run with `python -m benchmarks.bench_pipeline --songs 1000 --output bench_pipeline.json`
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+import pandas as pd
+from benchmarks.corpus import synthetic_corpus
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordisolator import ChordIsolator
+from chordal_wip.encoded import EncodedCorpus
+from chordal_wip.key import KeyModel, KeyPredictor, predict_keys
+from chordal_wip.scales import get_ref_scales
+
+
+# Stages ----
+def stage_isolate(songs: list, engine="pipeline") -> tuple:
+    series = pd.Series(songs)
+    n_tokens = sum(len(song.split()) for song in songs)
+
+    def run():
+        ChordIsolator(engine=engine).isolate_series(series)
+
+    return run, n_tokens
+
+
+def stage_isolate_fused(songs: list) -> tuple:
+    return stage_isolate(songs, engine="fused")
+
+
+def stage_canonicalize(songs: list) -> tuple:
+    isolated = _isolated(songs)
+    n_tokens = sum(len(txt.split()) for txt in isolated)
+
+    def run():
+        cc = ChordCanonizer()
+        for txt in isolated:
+            cc.canonicalize(txt)
+
+    return run, n_tokens
+
+
+def stage_canonicalize_series(songs: list) -> tuple:
+    isolated = pd.Series(_isolated(songs))
+    n_tokens = sum(len(txt.split()) for txt in isolated)
+
+    def run():
+        ChordCanonizer().canonicalize_series(isolated)
+
+    return run, n_tokens
+
+
+def stage_key_prediction(songs: list) -> tuple:
+    isolated = _isolated(songs)
+    n_tokens = sum(len(txt.split()) for txt in isolated)
+    reference = get_ref_scales()
+
+    def run():
+        for txt in isolated:
+            KeyPredictor(txt, reference)
+
+    return run, n_tokens
+
+
+def stage_key_model(songs: list) -> tuple:
+    isolated = _isolated(songs)
+    n_tokens = sum(len(txt.split()) for txt in isolated)
+    model = KeyModel.fit()
+
+    def run():
+        for txt in isolated:
+            model.predict(txt)
+
+    return run, n_tokens
+
+
+def stage_predict_keys(songs: list) -> tuple:
+    isolated = EncodedCorpus.from_series(pd.Series(_isolated(songs)))
+    n_tokens = len(isolated.ids)
+
+    def run():
+        predict_keys(isolated)
+
+    return run, n_tokens
+
+
+def stage_chained(songs: list) -> tuple:
+    series = pd.Series(songs)
+    n_tokens = sum(len(song.split()) for song in songs)
+    reference = get_ref_scales()
+
+    def run():
+        cc = ChordCanonizer()
+        for txt in ChordIsolator().isolate_series(series):
+            if txt:
+                KeyPredictor(cc.canonicalize(txt), reference)
+
+    return run, n_tokens
+
+
+STAGES = {
+    "isolate": stage_isolate,
+    "isolate_fused": stage_isolate_fused,
+    "canonicalize": stage_canonicalize,
+    "canonicalize_series": stage_canonicalize_series,
+    "key_prediction": stage_key_prediction,
+    "key_model": stage_key_model,
+    "predict_keys": stage_predict_keys,
+    "chained": stage_chained,
+}
+
+
+def _isolated(songs: list) -> list:
+    """Non-empty isolated songs, the input of the stages after isolation"""
+    iso = ChordIsolator()
+    isolated = (iso.raw_chord_isolation(song) for song in songs)
+    return [txt for txt in isolated if txt]
+
+
+# Runner ----
+def _measure(stage: str, n_songs: int, seed: int, queue):
+    songs = synthetic_corpus(n_songs, seed=seed)
+    run, n_tokens = STAGES[stage](songs)
+
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    queue.put(
+        {
+            "stage": stage,
+            "songs": n_songs,
+            "tokens": n_tokens,
+            "seconds": round(elapsed, 4),
+            "songs_per_sec": round(n_songs / elapsed, 1),
+            "tokens_per_sec": round(n_tokens / elapsed, 1),
+            "peak_rss_mb": round(peak_rss / 1024, 1),
+        }
+    )
+
+
+def run_stage(stage: str, n_songs: int, seed: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(stage, n_songs, seed, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def metadata(n_songs: int, seed: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "songs": n_songs,
+        "seed": seed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split("\n")[0]
+    )
+    parser.add_argument("--songs", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--stages", nargs="+", choices=list(STAGES), default=list(STAGES)
+    )
+    parser.add_argument("--output", default="bench_pipeline.json")
+    args = parser.parse_args(argv)
+
+    results = []
+    for stage in args.stages:
+        result = run_stage(stage, args.songs, args.seed)
+        print(result)
+        results.append(result)
+
+    report = {"meta": metadata(args.songs, args.seed), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Deterministic synthetic song corpus for benchmarks.
+
+Chord lines are drawn from the chord shapes annotated in `data/annotated_chords.ods`, mixed
+with lyric lines, section headers and tab blocks, like the raw song texts of melodyGPT.
+"""
+
+import random
+import xml.etree.ElementTree as ET
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+
+ANNOTATED_CHORDS = Path(__file__).parents[1] / "data" / "annotated_chords.ods"
+
+ODS_NS = {
+    "table": "urn:oasis:names:tc:opendocument:xmlns:table:1.0",
+    "text": "urn:oasis:names:tc:opendocument:xmlns:text:1.0",
+}
+
+LYRICS = (
+    "I you love baby oh yeah the night heart and we never know"
+    " down my to in all your time way say go home Again Bridge"
+).split()
+
+SECTIONS = ["[Intro]", "[Verse]", "[Chorus]", "[Bridge]", "Chorus:", "x2"]
+
+STRINGS = ["e", "B", "G", "D", "A", "E"]
+
+
+@lru_cache
+def annotated_chords(path=ANNOTATED_CHORDS) -> tuple:
+    """
+    First column ("chords") of the annotated chord sheet.
+    The .ods file is a zip archive, so it is parsed with the standard library only.
+    """
+    with zipfile.ZipFile(path) as ods:
+        root = ET.fromstring(ods.read("content.xml"))
+
+    chords = []
+    for row in root.iter(f"{{{ODS_NS['table']}}}table-row"):
+        cell = row.find("table:table-cell", ODS_NS)
+        if cell is None:
+            continue
+        text = "".join(
+            "".join(p.itertext()) for p in cell.findall("text:p", ODS_NS)
+        )
+        if text:
+            chords.append(text)
+
+    # Drop the header
+    return tuple(chords[1:])
+
+
+def synthetic_song(rng: random.Random, chords: tuple, weights: list) -> str:
+    lines = []
+
+    for _ in range(rng.randint(3, 8)):
+        lines.append(rng.choice(SECTIONS))
+        kind = rng.random()
+
+        if kind < 0.1:
+            # Tab block
+            for string in STRINGS:
+                frets = "".join(
+                    rng.choice("-----0123h5p7")
+                    for _ in range(rng.randint(8, 24))
+                )
+                lines.append(f"{string}|{frets}|")
+            continue
+
+        for _ in range(rng.randint(2, 6)):
+            # Chord line followed by a lyric line
+            line = rng.choices(chords, weights, k=rng.randint(2, 6))
+            lines.append("   ".join(line))
+            lines.append(" ".join(rng.choices(LYRICS, k=rng.randint(4, 10))))
+
+    return "\n".join(lines)
+
+
+def synthetic_corpus(n_songs=1_000, seed=0) -> list:
+    """Deterministic list of `n_songs` raw song texts"""
+    rng = random.Random(seed)
+    chords = annotated_chords()
+
+    # Zipf-like popularity in sheet order (most common shapes first)
+    weights = [1 / rank for rank in range(1, len(chords) + 1)]
+
+    return [synthetic_song(rng, chords, weights) for _ in range(n_songs)]
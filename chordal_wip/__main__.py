@@ -0,0 +1,103 @@
+import argparse
+from chordal_wip.cache import LRUCache, SLRUCache
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordisolator import ChordIsolator
+from chordal_wip.spellings import (
+    build_spelling_table,
+    save_spelling_table,
+    table_fingerprint,
+)
+from chordal_wip.stream import isolate_file
+
+
+# Bounded verdict caches of `--cache-entries`
+CACHE_POLICIES = {"lru": LRUCache, "slru": SLRUCache}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m chordal_wip")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # Isolation ----
+    isolate = commands.add_parser(
+        "isolate",
+        help="Stream a JSONL, CSV or Parquet file through ChordIsolator",
+    )
+    isolate.add_argument("input", help="Input file (.jsonl, .csv, .parquet)")
+    isolate.add_argument("output", help="Output file (.jsonl, .csv, .parquet)")
+    isolate.add_argument("--column", default="chords_str")
+    isolate.add_argument("--output-column", default="chords_str_clean")
+    isolate.add_argument("--chunksize", type=int, default=10_000)
+    isolate.add_argument("--char-threshold", type=int, default=20)
+    isolate.add_argument(
+        "--engine", choices=ChordIsolator.ENGINES, default="pipeline"
+    )
+    isolate.add_argument(
+        "--workers", type=int, default=None, help="Processes per chunk"
+    )
+    isolate.add_argument(
+        "--cache", default=None, help="Verdict cache file to warm-start from"
+    )
+    isolate.add_argument(
+        "--cache-entries",
+        type=int,
+        default=None,
+        help="Bound the in-memory verdict cache, unbounded by default",
+    )
+    isolate.add_argument(
+        "--cache-policy",
+        choices=list(CACHE_POLICIES),
+        default="lru",
+        help="Eviction policy of the bounded verdict cache",
+    )
+
+    # Spelling table ----
+    spellings = commands.add_parser(
+        "build-spellings",
+        help="Rebuild the precompiled canonical spelling table of ChordCanonizer",
+    )
+    spellings.add_argument(
+        "--output", default=str(ChordCanonizer.SPELLING_TABLE_PATH)
+    )
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "isolate":
+        cache = None
+        if args.cache_entries is not None:
+            cache = CACHE_POLICIES[args.cache_policy](
+                max_entries=args.cache_entries
+            )
+
+        isolator = ChordIsolator(
+            char_threshold=args.char_threshold,
+            engine=args.engine,
+            cache=cache,
+        )
+        n_rows = isolate_file(
+            args.input,
+            args.output,
+            column=args.column,
+            output_column=args.output_column,
+            chunksize=args.chunksize,
+            isolator=isolator,
+            workers=args.workers,
+            cache_path=args.cache,
+        )
+        print(f"Wrote {n_rows} rows to {args.output}")
+
+    elif args.command == "build-spellings":
+        canonizer = ChordCanonizer()
+        table = build_spelling_table(canonizer)
+        save_spelling_table(table, args.output, table_fingerprint(canonizer))
+        print(f"Wrote {len(table)} spellings to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
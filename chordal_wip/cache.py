@@ -0,0 +1,260 @@
+import sys
+from collections import OrderedDict
+
+
+class VerdictCache:
+    """
+    Unbounded verdict cache with dict semantics and hit/miss bookkeeping.
+    Base class of the bounded policies, which only override storage and eviction.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._changes = None
+
+    # Public Methods ----
+    def get(self, key, default=None):
+        value = self._data.get(key)
+
+        if value is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "policy": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+        }
+
+    def items(self):
+        return self._data.items()
+
+    def clear(self):
+        self._data.clear()
+
+    def track_changes(self):
+        """Start (or restart) recording entries written from now on"""
+        self._changes = {}
+
+    def drain_changes(self):
+        """Return the entries written since `track_changes`, None when not tracking"""
+        changes = self._changes
+        if changes is not None:
+            self._changes = {}
+        return changes
+
+    # Dict protocol ----
+    def __setitem__(self, key, value):
+        self._data[key] = value
+
+        if self._changes is not None:
+            self._changes[key] = value
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.stats()})"
+
+
+class LRUCache(VerdictCache):
+    """
+    Verdict cache bounded by a number of entries and/or an approximate byte budget.
+    The least recently used entry is evicted first.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        if max_entries is None and max_bytes is None:
+            raise ValueError("Provide max_entries and/or max_bytes!")
+
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        value = self._data.get(key)
+
+        if value is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def stats(self) -> dict:
+        return {**super().stats(), "bytes": self.n_bytes}
+
+    def clear(self):
+        self._data.clear()
+        self.n_bytes = 0
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self.n_bytes -= _entry_size(key, self._data[key])
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self.n_bytes += _entry_size(key, value)
+
+        if self._changes is not None:
+            self._changes[key] = value
+
+        self._evict()
+
+    def _evict(self):
+        while self._over_budget(len(self._data), self.n_bytes):
+            key, value = self._data.popitem(last=False)
+            self.n_bytes -= _entry_size(key, value)
+            self.evictions += 1
+
+    def _over_budget(self, n_entries: int, n_bytes: int) -> bool:
+        if self.max_entries is not None and n_entries > self.max_entries:
+            return True
+
+        if self.max_bytes is not None and n_bytes > self.max_bytes:
+            return True
+
+        return False
+
+
+class SLRUCache(LRUCache):
+    """
+    Frequency-aware, segmented LRU cache.
+    New entries land in a probation segment and are promoted to a protected segment on their
+    first hit. Evictions always come from probation, so one-off junk tokens (lyrics, typos, tab
+    fragments) are dropped long before frequent chords like "G" or "Am".
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, protected_share=0.8):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes)
+        self.protected_share = protected_share
+        self._protected = OrderedDict()
+        self._protected_bytes = 0
+
+    def get(self, key, default=None):
+        value = self._protected.get(key)
+
+        if value is not None:
+            self.hits += 1
+            self._protected.move_to_end(key)
+            return value
+
+        value = self._data.pop(key, None)
+
+        if value is None:
+            self.misses += 1
+            return default
+
+        # Promote on second access
+        self.hits += 1
+        size = _entry_size(key, value)
+        self.n_bytes -= size
+        self._protected[key] = value
+        self._protected_bytes += size
+        self._demote()
+        return value
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "protected": len(self._protected),
+            "bytes": self.n_bytes + self._protected_bytes,
+        }
+
+    def items(self):
+        yield from self._protected.items()
+        yield from self._data.items()
+
+    def clear(self):
+        super().clear()
+        self._protected.clear()
+        self._protected_bytes = 0
+
+    def __setitem__(self, key, value):
+        if key in self._protected:
+            size = _entry_size(key, value)
+            self._protected_bytes += size - _entry_size(
+                key, self._protected[key]
+            )
+            self._protected[key] = value
+            self._protected.move_to_end(key)
+
+            if self._changes is not None:
+                self._changes[key] = value
+
+            self._evict()
+            return
+
+        super().__setitem__(key, value)
+
+    def __getitem__(self, key):
+        if key in self._protected:
+            return self._protected[key]
+        return self._data[key]
+
+    def __contains__(self, key):
+        return key in self._protected or key in self._data
+
+    def __len__(self):
+        return len(self._protected) + len(self._data)
+
+    def __iter__(self):
+        return (key for key, _ in self.items())
+
+    def _demote(self):
+        """Move least recently used protected entries back to probation"""
+        max_entries = (
+            self.max_entries and self.max_entries * self.protected_share
+        )
+        max_bytes = self.max_bytes and self.max_bytes * self.protected_share
+
+        while self._protected and (
+            (max_entries is not None and len(self._protected) > max_entries)
+            or (max_bytes is not None and self._protected_bytes > max_bytes)
+        ):
+            key, value = self._protected.popitem(last=False)
+            size = _entry_size(key, value)
+            self._protected_bytes -= size
+            self._data[key] = value
+            self.n_bytes += size
+
+        self._evict()
+
+    def _evict(self):
+        while self._data and self._over_budget(
+            len(self), self.n_bytes + self._protected_bytes
+        ):
+            key, value = self._data.popitem(last=False)
+            self.n_bytes -= _entry_size(key, value)
+            self.evictions += 1
+
+
+def _entry_size(key, value) -> int:
+    """Approximate memory footprint of a cache entry in bytes"""
+    size = sys.getsizeof(key)
+
+    if isinstance(value, str):
+        size += sys.getsizeof(value)
+
+    return size
@@ -0,0 +1,97 @@
+import hashlib
+import sqlite3
+from contextlib import closing
+from chordal_wip.cache import VerdictCache
+
+
+class CacheStore:
+    """
+    On-disk store for verdict caches, backed by a single SQLite file.
+
+    Rows are keyed by a namespace (e.g. "isolator") and a fingerprint of the rules that produced
+    the verdicts, so stale verdicts are never loaded after a rule change.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS verdicts (
+            namespace TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            token TEXT NOT NULL,
+            value,
+            PRIMARY KEY (namespace, fingerprint, token)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    # Public Methods ----
+    def load(self, namespace: str, fingerprint: str) -> list:
+        with closing(self._connect()) as con:
+            return con.execute(
+                "SELECT token, value FROM verdicts WHERE namespace = ? AND fingerprint = ?",
+                (namespace, fingerprint),
+            ).fetchall()
+
+    def save(self, namespace: str, fingerprint: str, items, append=False):
+        """
+        Write (token, value) pairs.
+        Without `append`, all rows of the namespace are replaced, which also drops stale fingerprints.
+        With `append`, rows are upserted and nothing else is touched.
+        """
+        with closing(self._connect()) as con, con:
+            if not append:
+                con.execute(
+                    "DELETE FROM verdicts WHERE namespace = ?", (namespace,)
+                )
+
+            con.executemany(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?)",
+                (
+                    (namespace, fingerprint, token, value)
+                    for token, value in items
+                ),
+            )
+
+    # Private Methods ----
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path)
+        con.execute(self.SCHEMA)
+        return con
+
+
+def fingerprint(*parts) -> str:
+    """Stable short hash of the rules (patterns, tables, versions) behind a cache"""
+    digest = hashlib.sha256(repr(parts).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def save_verdicts(
+    cache: VerdictCache, path, namespace: str, fingerprint: str, append=False
+):
+    """
+    Persist a verdict cache. Appending only writes the entries added since the last save or
+    load, so long running jobs can checkpoint cheaply.
+    """
+    changes = cache.drain_changes()
+
+    if append and changes is not None:
+        items = changes.items()
+    else:
+        items = list(cache.items())
+
+    CacheStore(path).save(namespace, fingerprint, items, append=append)
+    cache.track_changes()
+
+
+def load_verdicts(
+    cache: VerdictCache, path, namespace: str, fingerprint: str, decode=bool
+) -> int:
+    """Warm up a verdict cache from disk, returns the number of loaded entries"""
+    rows = CacheStore(path).load(namespace, fingerprint)
+
+    for token, value in rows:
+        cache[token] = decode(value)
+
+    cache.track_changes()
+    return len(rows)
@@ -1,6 +1,15 @@
 import re
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
+import numpy as np
 import pandas as pd
+from chordal_wip.cache import LRUCache, VerdictCache
+from chordal_wip.cachestore import fingerprint, load_verdicts, save_verdicts
+from chordal_wip.chordparts import ChordParts
+from chordal_wip.chordtable import ChordTable
+from chordal_wip.encoded import EncodedCorpus
+from chordal_wip.spellings import SPELLING_TABLE_PATH, load_spelling_table
+from chordal_wip.trace import Tracer
 
 
 class ChordCanonizer:
@@ -15,19 +24,31 @@ class ChordCanonizer:
 
     EXTENSIONS_REGEX = re.compile(r"[#b]?(?:2|4|5|6|7|9|11|13){1}[+-]?")
 
-    SPLIT_REGEX = re.compile(
-        r"""
-        \([^)]*\)
-        |sus(?:2|4)?
-        |add(?:2|4|5|6|7|9|11|13){1}[#b+-]?
-        |maj|M
-        |dim
-        |aug|\+
-        |m|min|-
-        |[#b]?(?:2|4|5|6|7|9|11|13){1}[+-]?
-        """,
-        re.VERBOSE,
-    )
+    # Modifier scanning ----
+    # Literal modifiers by first character, tried in order (so "maj" wins over "m")
+    MODIFIERS = {
+        "s": ("sus2", "sus4", "sus"),
+        "m": ("maj", "m"),
+        "M": ("M",),
+        "d": ("dim",),
+        "a": ("aug",),
+        "+": ("+",),
+        "-": ("-",),
+    }
+
+    # Degrees by first character, as in "add9", "b13" or "7+"
+    DEGREES = {
+        "2": ("2",),
+        "4": ("4",),
+        "5": ("5",),
+        "6": ("6",),
+        "7": ("7",),
+        "9": ("9",),
+        "1": ("11", "13"),
+    }
+
+    # Scanned remainders kept per instance, transposed chords share theirs ("m7" of "Am7")
+    MODIFIER_TABLE_SIZE = 4_096
 
     ALLOWED_QUALITIES = {
         "min": "m",
@@ -47,67 +68,250 @@ class ChordCanonizer:
 
     EDGE_CASES = {"E13-": "Em13"}
 
-    def __init__(self):
-        self._cached_chords = {}
+    # Bump whenever the canonization logic changes, so persisted caches are invalidated
+    CACHE_VERSION = 3
+
+    # Precompiled canonical spellings, only ever read.
+    # Tables of other rules (e.g. subclasses) are rebuilt once and kept in the user cache.
+    SPELLING_TABLE_PATH = SPELLING_TABLE_PATH
+
+    def __init__(
+        self,
+        cache: Optional[VerdictCache] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        """
+        Args:
+            cache: Memo of raw chord -> canonical chord (False if it cannot be canonicalized),
+                e.g. `LRUCache(max_entries=100_000)`. Unbounded by default.
+            tracer: Emits a "decompose" and a "canonicalize" event per sampled chord parse.
+                Memo hits are not traced. Off by default.
+        """
+        self._cached_chords = cache if cache is not None else VerdictCache()
+        self._tracer = tracer
+        self._tracing = False
+        self._modifier_table = LRUCache(max_entries=self.MODIFIER_TABLE_SIZE)
+        self._spellings = None
 
     # Public Method ----
     def canonicalize(self, txt: str):
         chords = txt.split(" ")
-        chords_cleaned = []
+        chords_cleaned = [self._canonicalize_chord(chord) for chord in chords]
+        return " ".join(chords_cleaned)
 
-        for chord in chords:
-            if chord in self._cached_chords:
-                if self._cached_chords[chord]:
-                    chords_cleaned.append(chord)
-                    continue
+    def canonicalize_series(self, series: pd.Series) -> pd.Series:
+        """
+        Corpus-level equivalent of `series.apply(self.canonicalize)`.
+        The distinct chords of the whole column are canonicalized once each and the rows are
+        rebuilt through the integer codes of the chords.
+        """
+        corpus = EncodedCorpus.from_series(series)
+        rows = self.canonicalize_encoded(corpus).to_strings()
 
-            # TODO: Dont like this part...
-            if chord in self.EDGE_CASES:
-                print(f"chord {chord} is an edge case!")
-                chord_cleaned = self.EDGE_CASES[chord]
+        return pd.Series(
+            rows, index=series.index, name=series.name, dtype=object
+        )
+
+    def canonicalize_many(
+        self, tokens: Iterable[str], workers=None, chunksize=2_000
+    ) -> list:
+        """
+        Canonical form of every chord token, in input order ("X" if it cannot be canonicalized).
+        The distinct tokens missing from the memo are split across a process pool, the memo
+        entries of the workers are merged into `_cached_chords` when the run ends.
+
+        Args:
+            tokens: Chord tokens, e.g. the vocabulary of an `EncodedCorpus`
+            workers: Number of processes, defaults to the number of CPUs
+            chunksize: Number of distinct tokens per task
+        """
+        tokens = list(tokens)
+        resolved = {}
+        novel = []
+
+        for token in dict.fromkeys(tokens):
+            cached = self._cached_chords.get(token)
+            if cached is None:
+                novel.append(token)
             else:
+                resolved[token] = cached
+
+        if novel:
+            chunks = [
+                novel[i : i + chunksize]
+                for i in range(0, len(novel), chunksize)
+            ]
+
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(type(self),),
+            ) as pool:
+                for memo in pool.map(_canonicalize_chunk, chunks):
+                    for token, canonical in memo.items():
+                        self._cached_chords[token] = canonical
+                    resolved.update(memo)
+
+        return [resolved[token] or "X" for token in tokens]
+
+    def canonicalize_encoded(self, corpus: EncodedCorpus) -> EncodedCorpus:
+        """
+        Canonicalize an `EncodedCorpus` (see `ChordIsolator.isolate_encoded`).
+        Only the vocabulary is canonicalized, token ids are remapped in bulk.
+        Songs without tokens stay empty instead of becoming "X".
+        """
+        canonical = [self._canonicalize_chord(chord) for chord in corpus.vocab]
+        mapping, vocab = pd.factorize(np.array(canonical, dtype=object))
+        return corpus.map_vocab(vocab.tolist(), mapping)
+
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters and size of the chord memo"""
+        return self._cached_chords.stats()
+
+    def save_cache(self, path="cached_chords.sqlite", append=False):
+        """
+        Persist the chord cache to a SQLite file, keyed by the fingerprint of the rule tables.
+        With `append`, only chords added since the last save/load are written (checkpointing).
+        """
+        save_verdicts(
+            self._cached_chords,
+            path,
+            "canonizer",
+            self._fingerprint(),
+            append=append,
+        )
+
+    def load_cache(self, path="cached_chords.sqlite") -> int:
+        """
+        Warm-start the chord cache from a file written by `save_cache`.
+        Entries produced by different rule tables are ignored.
+        """
+        return load_verdicts(
+            self._cached_chords,
+            path,
+            "canonizer",
+            self._fingerprint(),
+            decode=_decode_canonical,
+        )
+
+    def export_table(self, path) -> ChordTable:
+        """
+        Write the chord memo as a columnar `ChordTable`: raw and canonical chords plus the
+        canonical parts. A .parquet path requires pyarrow, any other path becomes a directory
+        of memory-mappable .npy columns.
+        """
+        table = ChordTable.from_canonizer(self)
+        table.save(path)
+        return table
+
+    def import_table(self, path) -> int:
+        """
+        Warm-start the chord memo from a table written by `export_table`.
+        Tables produced by different rule tables are ignored.
+        """
+        table = ChordTable.load(path, mmap=False)
+
+        if table.fingerprint != self._fingerprint():
+            return 0
+
+        for raw, canonical in table.items():
+            self._cached_chords[raw] = canonical
+
+        return len(table)
+
+    # Private Methods ----
+    def _canonicalize_chord(self, chord: str) -> str:
+        """Canonical form of a single chord, "X" if it cannot be canonicalized"""
+        cached = self._cached_chords.get(chord)
+
+        if cached is not None:
+            return cached or "X"
+
+        tracer = self._tracer
+        self._tracing = tracer is not None and tracer.begin()
+
+        # TODO: Dont like this part...
+        if chord in self.EDGE_CASES:
+            chord_cleaned = self.EDGE_CASES[chord]
+        else:
+            # Traced chords are parsed, so the trace shows their decomposition
+            chord_cleaned = None if self._tracing else self._spelled(chord)
+
+            if chord_cleaned is None:
                 # Canonization
                 raw_decomposed_chord = self._decompose(chord)
                 norm_decomposed_chord = self._normalize(raw_decomposed_chord)
                 chord_cleaned = self._reconstruct(norm_decomposed_chord)
 
-            if not chord_cleaned:
-                self._cached_chords[chord] = False
-                chords_cleaned.append("X")
-                continue
-            else:
-                self._cached_chords[chord_cleaned] = True
-            chords_cleaned.append(chord_cleaned)
+        if self._tracing:
+            tracer.emit(
+                "canonicalize",
+                chord=chord,
+                edge_case=chord in self.EDGE_CASES,
+                canonical=chord_cleaned or None,
+            )
 
-        print(self._cached_chords)
-        return " ".join(chords_cleaned)
+        if not chord_cleaned:
+            self._cached_chords[chord] = False
+            return "X"
+
+        self._cached_chords[chord] = chord_cleaned
+        return chord_cleaned
+
+    def _spelled(self, chord: str) -> Optional[str]:
+        """
+        Canonical form from the precompiled spelling table, None for spellings it lacks.
+        Plain slash chords ("Am7/G") are served from the table entry without slash.
+        """
+        if self._spellings is None:
+            self._spellings = load_spelling_table(self)
+
+        base, slash, bass = chord.partition("/")
+
+        if not base or base[0] not in "ABCDEFG":
+            return None
+
+        root = base[:2] if base[1:2] in ("#", "b") else base[0]
+        tail = self._spellings.get(base[len(root) :])
+
+        if tail is None:
+            return None
 
-    def save_cache(self):
-        df = pd.DataFrame.from_dict(
-            self._cached_chords, orient="index", columns=["value"]
+        if not slash:
+            return root + tail
+
+        # The bass must be a bare note, and unclear modifiers are placed after it
+        if bass and bass[0] in "ABCDEFG" and bass[1:] in ("", "#", "b"):
+            if "(u:" not in tail:
+                return root + tail + "/" + bass
+
+        return None
+
+    def _fingerprint(self) -> str:
+        """Version of the cached chords, changes whenever a rule table does"""
+        return fingerprint(
+            self.CACHE_VERSION,
+            self.ROOT_REGEX.pattern,
+            self.EXTENSIONS_REGEX.pattern,
+            sorted(self.MODIFIERS.items()),
+            sorted(self.DEGREES.items()),
+            sorted(self.ALLOWED_QUALITIES.items()),
+            sorted(self.EDGE_CASES.items()),
         )
-        df.index.name = "chord"
-        df.reset_index(inplace=True)
-        df.to_csv("cached_chords.csv")
 
-    # Private Methods ----
-    def _decompose(self, chord: str) -> dict:
-        decomp_chord = {
-            "root": None,
-            "quality": None,
-            "adds": [],
-            "sus": None,
-            "dominant": None,
-            "extensions": [],
-            "alterations": [],
-            "slash": None,
-            "unclear": [],
-        }
+    def _decompose(self, chord: str) -> ChordParts:
+        quality = None
+        adds = []
+        sus = None
+        extensions = []
+        slash = None
+        unclear = []
 
         chord = chord.replace("(", "").replace(")", "")
-        print(f"chord : {chord}")
 
-        tokens = []
+        modifiers = ()
+        slash_bass_candidate = None
+        remainder = None
 
         # Slash handling
         if "/" in chord:
@@ -116,66 +320,177 @@ class ChordCanonizer:
             chord = "".join(parts[0:-1])  # Allows multiple slashes
 
             slash_bass_candidate = parts[-1]
-            print(f"slash_bass_candidate : {slash_bass_candidate}")
 
             if self.ROOT_REGEX.match(slash_bass_candidate):
-                decomp_chord["slash"] = slash_bass_candidate
+                slash = slash_bass_candidate
             else:
-                tokens.append(slash_bass_candidate)
+                token = slash_bass_candidate.strip()
+                modifier = self._slash_modifier(token)
+                if modifier is None:
+                    unclear.append(token)
+                else:
+                    modifiers = (modifier,)
 
         # Root handling
-        root_capture = self.ROOT_REGEX.match(chord)
-
-        if not root_capture:
-            return decomp_chord
+        if not chord or chord[0] not in "ABCDEFG":
+            if self._tracing:
+                self._trace_decompose(
+                    chord, slash_bass_candidate, remainder, modifiers, unclear
+                )
+            return ChordParts(slash=slash)
+
+        root = chord[:2] if chord[1:2] in ("#", "b") else chord[0]
+        remainder = chord[len(root) :]
+        modifiers += self._modifiers(remainder)
 
-        root = root_capture.group(0)
-        decomp_chord["root"] = root
+        if self._tracing:
+            self._trace_decompose(
+                chord, slash_bass_candidate, remainder, modifiers, unclear
+            )
 
         # Modifier handling
-        remainder = chord[len(root) :]
-        print(f"remainder : {remainder}")
+        for token, kind, _ in modifiers:
+            if kind == "add":
+                adds.append(token)
+
+            elif token.startswith("sus"):
+                sus = self.ALLOWED_QUALITIES[token]
 
-        tokens = tokens + self.SPLIT_REGEX.findall(remainder)
-        print(f"tokens : {tokens}")
+            elif token in self.ALLOWED_QUALITIES:
+                quality = self.ALLOWED_QUALITIES[token]
 
-        for token in tokens:
-            token = token.strip()
+            elif kind == "degree":
+                extensions.append(token)
 
-            if token.startswith("add"):
-                decomp_chord["adds"].append(token)
+            else:
+                unclear.append(token)
+
+        return ChordParts(
+            root=root,
+            quality=quality,
+            adds=tuple(adds),
+            sus=sus,
+            extensions=tuple(extensions),
+            slash=slash,
+            unclear=tuple(unclear),
+        )
 
-            elif token.startswith("sus"):
-                decomp_chord["sus"] = self.ALLOWED_QUALITIES[token]
+    def _modifiers(self, remainder: str) -> tuple:
+        """`_scan_modifiers` of a remainder, memoized in the bounded modifier table"""
+        modifiers = self._modifier_table.get(remainder)
 
-            elif token in self.ALLOWED_QUALITIES:
-                decomp_chord["quality"] = self.ALLOWED_QUALITIES[token]
+        if modifiers is None:
+            modifiers = self._modifier_table[remainder] = self._scan_modifiers(
+                remainder
+            )
 
-            elif self.EXTENSIONS_REGEX.match(token):
-                decomp_chord["extensions"].append(token)
+        return modifiers
 
+    def _slash_modifier(self, token: str) -> Optional[tuple]:
+        """
+        The single modifier spelled after a slash, e.g. "b5" of "Cm7/b5", None for anything else.
+        Qualities are looked up whole ("min") and degrees may carry a trailing accidental ("9b").
+        """
+        if token in self.ALLOWED_QUALITIES:
+            return (token, "literal", None)
+
+        modifiers = self._modifiers(token)
+        if len(modifiers) == 1 and modifiers[0][0] == token:
+            return modifiers[0]
+
+        if token[-1:] in ("#", "b"):
+            modifiers = self._modifiers(token[:-1])
+            if len(modifiers) == 1 and modifiers[0][:2] == (
+                token[:-1],
+                "degree",
+            ):
+                return (token, "degree", modifiers[0][2])
+
+        return None
+
+    def _scan_modifiers(self, remainder: str) -> tuple:
+        """
+        Split the modifiers following the root in a single left-to-right pass.
+        Returns (token, kind, degree) triples, kind being "add", "literal" (qualities and sus)
+        or "degree" (extensions) and degree the number sorting adds and extensions, None for
+        literals. Characters that start no modifier are skipped.
+        """
+        modifiers = []
+        n = len(remainder)
+        i = 0
+
+        while i < n:
+            c = remainder[i]
+
+            # add<degree>[#b+-]
+            if c == "a" and remainder.startswith("add", i):
+                end = self._match_degree(remainder, i + 3)
+                if end:
+                    degree = int(remainder[i + 3 : end])
+                    if end < n and remainder[end] in "#b+-":
+                        end += 1
+                    modifiers.append((remainder[i:end], "add", degree))
+                    i = end
+                    continue
+
+            for literal in self.MODIFIERS.get(c, ()):
+                if remainder.startswith(literal, i):
+                    modifiers.append((literal, "literal", None))
+                    i += len(literal)
+                    break
             else:
-                decomp_chord["unclear"].append(token)
+                # [#b]<degree>[+-]
+                start = i + (c in "#b")
+                end = self._match_degree(remainder, start)
+                if end:
+                    degree = int(remainder[start:end])
+                    if end < n and remainder[end] in "+-":
+                        end += 1
+                    modifiers.append((remainder[i:end], "degree", degree))
+                    i = end
+                else:
+                    i += 1
+
+        return tuple(modifiers)
+
+    def _match_degree(self, txt: str, i: int) -> int:
+        """End of the degree starting at `txt[i]`, 0 if there is none"""
+        for degree in self.DEGREES.get(txt[i : i + 1], ()):
+            if txt.startswith(degree, i):
+                return i + len(degree)
+
+        return 0
+
+    def _trace_decompose(
+        self, chord, slash_bass_candidate, remainder, modifiers, unclear
+    ):
+        self._tracer.emit(
+            "decompose",
+            chord=chord,
+            slash_bass_candidate=slash_bass_candidate,
+            remainder=remainder,
+            tokens=list(unclear) + [token for token, _, _ in modifiers],
+        )
 
-        return decomp_chord
+    def _normalize(self, parts: ChordParts) -> ChordParts:
+        quality = parts.quality
+        alterations = list(parts.alterations)
 
-    def _normalize(self, decomp_chord: dict) -> dict:
-        if decomp_chord["quality"] == "aug":
-            decomp_chord["quality"] = ""
-            decomp_chord["alterations"].append("#5")
+        if quality == "aug":
+            quality = ""
+            alterations.append("#5")
 
         # normalize adds and dedup add / extension overlap
         new_adds = []
-        for add in decomp_chord["adds"]:
+        for add in parts.adds:
             add_extension_overlap = add.replace("add", "")
-            if add_extension_overlap not in decomp_chord["extensions"]:
+            if add_extension_overlap not in parts.extensions:
                 new_adds.append(add)
-        decomp_chord["adds"] = sorted(set(new_adds), key=self._num_sort)
+        adds = sorted(set(new_adds), key=self._num_sort)
 
         # normalize extensions
         new_extensions = []
-        alterations = []
-        for ext in decomp_chord["extensions"]:
+        for ext in parts.extensions:
             if ext == "5+":
                 alterations.append("#5")
                 continue
@@ -192,81 +507,79 @@ class ChordCanonizer:
 
             new_extensions.append(ext)
 
-        decomp_chord["extensions"] = sorted(
-            set(new_extensions), key=self._num_sort
+        parts = ChordParts(
+            root=parts.root,
+            quality=quality,
+            adds=tuple(adds),
+            sus=parts.sus,
+            dominant=parts.dominant,
+            extensions=tuple(sorted(set(new_extensions), key=self._num_sort)),
+            alterations=tuple(sorted(set(alterations), key=self._num_sort)),
+            slash=parts.slash,
+            unclear=parts.unclear,
         )
 
-        decomp_chord["alterations"] = sorted(
-            set(alterations + decomp_chord["alterations"]), key=self._num_sort
-        )
         # TESTING: Major triad check
-        major_triad = self._check_empty_dict_keys(
-            decomp_chord, ["root", "slash"]
-        )
+        major_triad = self._check_empty_parts(parts, ("root", "slash"))
         if major_triad:
-            decomp_chord["quality"] = "maj"
+            parts = parts._replace(quality="maj")
 
         # TESTING: Does it work consistently?
-        if self._is_dominant(decomp_chord):
-            decomp_chord["dominant"] = True
+        if self._is_dominant(parts):
+            parts = parts._replace(dominant=True)
 
-        return decomp_chord
+        return parts
 
-    def _reconstruct(self, decomp_chord: dict) -> str:
-        if not decomp_chord["root"]:
+    def _reconstruct(self, parts: ChordParts) -> str:
+        if not parts.root:
             return None
 
-        chord = decomp_chord["root"]
+        chord = parts.root
 
-        if decomp_chord["quality"]:
-            chord += "(q:" + decomp_chord["quality"] + ")"
+        if parts.quality:
+            chord += "(q:" + parts.quality + ")"
 
-        if decomp_chord["adds"]:
-            chord += "(m:" + ",".join(decomp_chord["adds"]) + ")"
+        if parts.adds:
+            chord += "(m:" + ",".join(parts.adds) + ")"
 
-        if decomp_chord["sus"]:
-            chord += "(s:" + decomp_chord["sus"] + ")"
+        if parts.sus:
+            chord += "(s:" + parts.sus + ")"
 
-        if decomp_chord["dominant"]:
+        if parts.dominant:
             chord += "(d:" + "True" + ")"
 
-        if decomp_chord["extensions"]:
-            chord += "(e:" + ",".join(decomp_chord["extensions"]) + ")"
+        if parts.extensions:
+            chord += "(e:" + ",".join(parts.extensions) + ")"
 
-        if decomp_chord["alterations"]:
-            chord += "(a:" + ",".join(decomp_chord["alterations"]) + ")"
+        if parts.alterations:
+            chord += "(a:" + ",".join(parts.alterations) + ")"
 
-        if decomp_chord["slash"]:
-            chord += "/" + decomp_chord["slash"]
+        if parts.slash:
+            chord += "/" + parts.slash
 
-        unclear = decomp_chord["unclear"]
-        if unclear:
-            chord += "(u:" + ",".join(unclear) + ")"
+        if parts.unclear:
+            chord += "(u:" + ",".join(parts.unclear) + ")"
 
         return chord
 
     def _num_sort(self, txt: str):
         """
-        Sort modifiers lists like `["add9", "add2", "add13"]`
+        Sort modifiers lists like `["add9", "add2", "add13"]`, by the degree the scanner finds
         """
-        numb = re.search(r"\d+", txt)
-
-        if numb:
-            return int(numb.group())
+        for _, _, degree in self._modifiers(txt):
+            if degree is not None:
+                return degree
 
         return 999
 
-    def _check_empty_dict_keys(self, d: dict, ignore_keys: list):
-        all_keys_empty = all(
-            [
-                val is None or val == []
-                for key, val in d.items()
-                if key not in ignore_keys
-            ]
-        )
-        return all_keys_empty
+    def _check_empty_parts(self, parts: ChordParts, ignore_fields: tuple):
+        for field, val in zip(parts._fields, parts):
+            if val is not None and val != () and field not in ignore_fields:
+                return False
 
-    def _is_dominant(self, d: dict):
+        return True
+
+    def _is_dominant(self, parts: ChordParts):
         """
         Check if a (decomposed) chord qualifies as a dominant chord.
             - Major chords do not qualify as dominant, because the 7th is not minor.
@@ -274,16 +587,38 @@ class ChordCanonizer:
             - Diminished chord do not qualify as dominant, because the 5th is diminished.
             - Suspended chord do not qualify as dominant, because they are lacking a 3rd.
         """
-        if d["quality"] in ["maj", "m", "dim"]:
+        if parts.quality in ["maj", "m", "dim"]:
             return False
 
-        if d["sus"]:
+        if parts.sus:
             return False
 
         has_seventh = any(
-            ext in ["7", "9", "11", "13"] for ext in d["extensions"]
+            ext in ["7", "9", "11", "13"] for ext in parts.extensions
         )
 
         return has_seventh
 
 
+_worker_canonizer = None
+
+
+def _init_worker(cls):
+    """Build the process-local canonizer, its memo only records what this worker adds"""
+    global _worker_canonizer
+
+    _worker_canonizer = cls()
+    _worker_canonizer._cached_chords.track_changes()
+
+
+def _canonicalize_chunk(tokens: list) -> dict:
+    """Canonicalize a chunk of distinct tokens, returns their memo entries"""
+    cc = _worker_canonizer
+    for token in tokens:
+        cc._canonicalize_chord(token)
+    return cc._cached_chords.drain_changes()
+
+
+def _decode_canonical(value):
+    """Persisted memo values are canonical strings, or 0 for chords that failed"""
+    return value if isinstance(value, str) else False
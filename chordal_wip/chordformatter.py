@@ -1,13 +1,148 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+from chordal_wip.cache import VerdictCache
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordparts import ChordParts
+from chordal_wip.encoded import EncodedCorpus
+
+
 class ChordFormatter:
-    def __init__(self, verbose_chord):
-        self.tidy_chord = self.tidy_up(verbose_chord)
-
-    def tidy_up(self):
-        pass
-
-    def _format_extensions(self, extensions):
-        extensions_formatted = ""
-        if extensions:
-            extensions_formatted += extensions[0]
-            if len(extensions) > 1:
-                extensions_formatted += "(e:" + ",".join(extensions[1:]) + ")"
+    """
+    Canonical chord -> human chord notation, e.g. "Eb(q:maj)(m:add9)(e:7)/G" -> "Ebmaj7add9/G".
+
+    Chords are rendered from their `ChordParts`: root, quality, leading extension, the other
+    extensions and alterations in brackets, sus, adds, e.g. "C(d:True)(e:7,b9)" -> "C7(b9)".
+    An extension leading with an accidental right after the root is rendered as the slash modifier
+    it comes from, e.g. "A(e:b5)" -> "A/b5".
+    Canonicalizing the rendered chord gives back the canonical one, except for the odd "4" quality
+    (e.g. "C4" -> "C(q:sus4)"), rendered as a sus4.
+    """
+
+    # Quality of a canonical chord -> symbol, "maj" is only spelled out when something follows
+    QUALITY_SYMBOLS = {
+        "maj": "maj",
+        "m": "m",
+        "dim": "dim",
+        "sus4": "sus4",
+    }
+
+    def __init__(
+        self,
+        cache: Optional[VerdictCache] = None,
+        canonizer: Optional[ChordCanonizer] = None,
+    ):
+        """
+        Args:
+            cache: Memo of canonical chord -> formatted chord, e.g. `LRUCache(max_entries=10_000)`.
+                Unbounded by default.
+            canonizer: Parses chords that are not in canonical notation (e.g. the edge case "Em13").
+        """
+        self._formatted_chords = cache if cache is not None else VerdictCache()
+        self._canonizer = (
+            canonizer if canonizer is not None else ChordCanonizer()
+        )
+
+    # Public Methods ----
+    def format(self, chord: str) -> str:
+        """Human notation of a canonical chord, "X" and unparsable tokens are returned as is"""
+        formatted = self._formatted_chords.get(chord)
+
+        if formatted is None:
+            formatted = self._formatted_chords[chord] = self._format_chord(
+                chord
+            )
+
+        return formatted
+
+    def tidy_up(self, verbose_chords: str) -> str:
+        """Format space-joined canonical chords, e.g. a row of `ChordCanonizer.canonicalize`"""
+        return " ".join(
+            self.format(chord) for chord in verbose_chords.split(" ")
+        )
+
+    def format_series(self, series: pd.Series) -> pd.Series:
+        """
+        Corpus-level equivalent of `series.apply(self.tidy_up)`.
+        The distinct chords of the whole column are formatted once each.
+        """
+        corpus = EncodedCorpus.from_series(series)
+        rows = self.format_encoded(corpus).to_strings()
+
+        return pd.Series(
+            rows, index=series.index, name=series.name, dtype=object
+        )
+
+    def format_encoded(self, corpus: EncodedCorpus) -> EncodedCorpus:
+        """
+        Format an `EncodedCorpus` of canonical chords.
+        Only the vocabulary is formatted, token ids are remapped in bulk.
+        """
+        formatted = [self.format(chord) for chord in corpus.vocab]
+        mapping, vocab = pd.factorize(np.array(formatted, dtype=object))
+        return corpus.map_vocab(vocab.tolist(), mapping)
+
+    def cache_stats(self) -> dict:
+        """Hit/miss/eviction counters and size of the formatting memo"""
+        return self._formatted_chords.stats()
+
+    # Private Methods ----
+    def _format_chord(self, chord: str) -> str:
+        try:
+            parts = ChordParts.from_canonical(chord)
+        except ValueError:
+            # Not in canonical notation (e.g. the edge case "Em13"), parse it from scratch
+            canonizer = self._canonizer
+            parts = canonizer._normalize(canonizer._decompose(chord))
+
+        if parts.root is None:
+            return chord
+
+        return self._format_parts(parts)
+
+    def _format_parts(self, parts: ChordParts) -> str:
+        extensions = list(parts.extensions)
+        alterations = list(parts.alterations)
+
+        # The first unaltered extension leads, e.g. the 7 of "m7(b5)"
+        head = next((ext for ext in extensions if ext.isdigit()), "")
+        if head:
+            extensions.remove(head)
+
+        quality = self.QUALITY_SYMBOLS.get(parts.quality, "")
+
+        # The #5 of an augmented chord reads "aug", or "5+" after another quality
+        if "#5" in alterations:
+            alterations.remove("#5")
+            if quality:
+                alterations.append("5+")
+            else:
+                quality = "aug"
+
+        bracketed = extensions + alterations + list(parts.unclear)
+        slash = parts.slash
+
+        # Right after the root, a leading accidental would be read as part of the root
+        # ("A(b5)" -> "Ab5"), such an extension comes from a slash modifier ("A/b5")
+        leading = bracketed[0][:1] if bracketed else ""
+        if leading in ("#", "b") and not (quality or head or slash):
+            slash = bracketed.pop(0)
+
+        # Major triad
+        if quality == "maj" and not (
+            head or parts.sus or parts.adds or bracketed
+        ):
+            quality = ""
+
+        # Brackets come before sus and adds, so "add13(#11)" can't be read back as "add13#"
+        chord = parts.root + quality + head
+
+        if bracketed:
+            chord += "(" + ",".join(bracketed) + ")"
+
+        chord += (parts.sus or "") + "".join(parts.adds)
+
+        if slash:
+            chord += "/" + slash
+
+        return chord
@@ -1,6 +1,17 @@
 import re
-from typing import Optional
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Optional
+import numpy as np
 import pandas as pd
+from chordal_wip.cache import VerdictCache
+from chordal_wip.cachestore import fingerprint, load_verdicts, save_verdicts
+from chordal_wip.encoded import EncodedCorpus
+
+ACCEPT_TABLE_PATH = Path(__file__).parent / "data" / "common_chords.txt"
 
 
 class ChordIsolator:
@@ -9,23 +20,112 @@ class ChordIsolator:
     Tokenization, minimal normalization and rough selection of tokens based on chord structure.
     """
 
-    def __init__(self, char_threshold=20):
+    # Tokenization ----
+    # Same as (?<=\S)[,^%](?=\S), but leading with the charset is much faster
+    SPLIT_SYMBOL_REGEX = re.compile(r"[,^%](?<=\S[,^%])(?=\S)")
+    WHITESPACE_REGEX = re.compile(r"\s+")
+
+    # Fused engine: one pass over the raw text that tokenizes and erodes at once.
+    # A token starts at a word start or after a separator enclosed by non-whitespace, the
+    # eroded prefix is skipped possessively and the capture runs from the first note to the
+    # next whitespace or enclosed separator. Tokens without a note give an empty capture, so
+    # the scanner consumes them whole instead of retrying at every character.
+    SCAN_REGEX = re.compile(
+        r"""
+        (?=\S)(?:(?<!\S)|(?<=\S[,^%]))
+        (?:[^\s,^%A-G]|(?<!\S)[,^%]|[,^%](?!\S))*+
+        ([A-G](?:[^\s,^%]|[,^%](?!\S))*)?
+        """,
+        re.VERBOSE,
+    )
+    HOMOGENIZE_TABLE = str.maketrans(
+        {"♭": "b", "♯": "#", "°": "dim", "–": "-"}
+    )
+
+    ENGINES = ("pipeline", "fused")
+
+    # Chord grammar ----
+    # Pieces of `_chord_regex`, the fast-path charset is derived from the same pieces
+    ROOT_NOTES = "ABCDEFG"
+    ACCIDENTALS = "#b"
+    QUALITIES = ("maj", "min", "dim", "aug", "sus", "add", "m", "M")
+    EXTENSIONS = ("2", "4", "5", "6", "7", "9", "10", "11", "13")
+    ALTERATIONS = "+#-"
+
+    # Instrumentation ----
+    STAT_OUTCOMES = (
+        "eroded_empty",
+        "fast_accept",
+        "cache_hit_valid",
+        "cache_hit_junk",
+        "rejected_long",
+        "rejected_tab",
+        "rejected_charset",
+        "validated",
+        "invalid",
+    )
+    STAT_STAGES = (
+        "tokenize",
+        "erode",
+        "homogenize",
+        "fast_accept",
+        "cache",
+        "reject",
+        "validate",
+    )
+
+    def __init__(
+        self,
+        char_threshold=20,
+        cache: Optional[VerdictCache] = None,
+        engine="pipeline",
+        instrument=False,
+        accept_table: Optional[Iterable[str]] = None,
+    ):
+        """
+        Args:
+            char_threshold: Tokens with at least this many characters are rejected
+            cache: Verdict cache policy, e.g. `LRUCache(max_entries=100_000)`. Unbounded by default.
+            engine: "pipeline" (tokenize, erode, homogenize, reject, validate) or "fused",
+                a single-pass scanner with identical output
+            instrument: Count tokens per outcome and time every stage, see `stats()`.
+                Only the pipeline engine is instrumented.
+            accept_table: Frequent chord spellings accepted without any check, defaults to
+                the table shipped with the package. Pass an empty list to disable.
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(
+                f"Invalid engine: {engine}. Must be one of {self.ENGINES}."
+            )
+
+        if instrument and engine != "pipeline":
+            raise ValueError("Only the pipeline engine can be instrumented!")
+
         self.char_threshold = char_threshold
+        self.engine = engine
         self._chord_regex = self._init_chord_regex()
-        self._cached_tokens = {}
+        self._fused_regex = self._init_fused_regex()
+        self._charset = self._init_charset()
+        self._accept = self._init_accept(accept_table)
+        self._cached_tokens = cache if cache is not None else VerdictCache()
+        self._counts = None
+        self._seconds = None
+
+        if instrument:
+            self._init_instrumentation()
 
     # Internal instance ----
     def _init_chord_regex(self):
         # Chord root
-        root = "[A-G]{1}"
-        accidental = "[#b]?"
+        root = rf"[{self.ROOT_NOTES}]{{1}}"
+        accidental = rf"[{self.ACCIDENTALS}]?"
         root_note = rf"{root}{accidental}"
 
         # Chord modifiers
         brackets = r"(?:\([^\)]*\))"  # match brackets with anything in it
-        qualities = r"(?:maj|min|dim|aug|sus|add|m|M)"
-        extensions = r"(?:2|4|5|6|7|9|10|11|13)"
-        alterations = r"(?:[+#-])"
+        qualities = rf"(?:{'|'.join(self.QUALITIES)})"
+        extensions = rf"(?:{'|'.join(self.EXTENSIONS)})"
+        alterations = rf"(?:[{re.escape(self.ALTERATIONS)}])"
 
         # Slash Logic
         # Either root (Cm7/G) OR some random chord modifier (Cm7/b5)
@@ -39,70 +139,416 @@ class ChordIsolator:
 
         return re.compile(chord_anatomy, re.VERBOSE)
 
+    def _init_fused_regex(self):
+        """`_reject` and `_validate` folded into a single anchored pattern"""
+        not_too_long = rf"(?=.{{0,{max(self.char_threshold - 1, 0)}}}$)"
+        not_a_tab = r"(?![A-G][#b]?[-|:\s])"
+        chord_anatomy = self._chord_regex.pattern.removeprefix("^")
+
+        return re.compile(
+            rf"^{not_too_long}{not_a_tab}{chord_anatomy}",
+            self._chord_regex.flags,
+        )
+
+    def _init_charset(self) -> frozenset:
+        """
+        Every character `_chord_regex` can match outside of brackets. Tokens with any other
+        character (and no bracket) are junk without running the regex.
+        """
+        return frozenset(
+            self.ROOT_NOTES
+            + self.ACCIDENTALS
+            + "".join(self.QUALITIES)
+            + "".join(self.EXTENSIONS)
+            + self.ALTERATIONS
+            + "/"
+        )
+
+    def _init_accept(self, accept_table: Optional[Iterable[str]]):
+        """
+        Keep only the spellings this instance would accept anyway, so the fast path can
+        never change a verdict, whatever the table or `char_threshold`.
+        """
+        if accept_table is None:
+            accept_table = load_accept_table()
+
+        return frozenset(
+            token
+            for token in accept_table
+            if not self._reject(token) and self._validate(token)
+        )
+
+    def _init_instrumentation(self):
+        """
+        Swap the hot-path methods for timed and counted variants on this instance only,
+        so a non-instrumented isolator does not pay a single extra check.
+        """
+        self.reset_stats()
+        self._tokenize = self._timed("tokenize", self._tokenize)
+        self._tokenize_series = self._timed("tokenize", self._tokenize_series)
+        self._process_token = self._process_token_instrumented
+
+    def _timed(self, stage: str, func):
+        def timed(*args):
+            start = time.perf_counter()
+            out = func(*args)
+            self._seconds[stage] += time.perf_counter() - start
+            return out
+
+        return timed
+
     # Public Method ----
     def raw_chord_isolation(self, txt: str) -> str:
+        if self.engine == "fused":
+            return " ".join(self._scan(txt))
+
         tokens = self._tokenize(txt)
         tokens_list = self._process_tokens(tokens)
         return " ".join(tokens_list)
 
-    def save_cache(self):
-        df = pd.DataFrame.from_dict(
-            self._cached_tokens, orient="index", columns=["value"]
+    def isolate_series(self, series: pd.Series) -> pd.Series:
+        """
+        Corpus-level equivalent of `series.apply(self.raw_chord_isolation)`.
+        The whole column is tokenized at once, every distinct token is processed a single time
+        and the rows are rebuilt through the integer codes of the tokens.
+        The fused engine scans the rows directly, it already costs one cache lookup per token.
+        """
+        if self.engine == "fused":
+            rows = [self.raw_chord_isolation(txt) for txt in series]
+        else:
+            rows = self.isolate_encoded(series).to_strings()
+
+        return pd.Series(
+            rows, index=series.index, name=series.name, dtype=object
+        )
+
+    def isolate_encoded(self, series: pd.Series) -> EncodedCorpus:
+        """
+        Isolate a whole column into an `EncodedCorpus`: a vocabulary of chord spellings plus
+        flat token ids and per-song offsets, so downstream stages don't need to re-split.
+        """
+        if self.engine == "fused":
+            return EncodedCorpus.from_token_lists(
+                self._scan(txt) for txt in series
+            )
+
+        tokens = self._tokenize_series(series)
+        n_rows = len(tokens)
+
+        # Flatten rows and map every token to the position of its distinct value
+        lengths = tokens.str.len().to_numpy(dtype=np.int64)
+        flat = np.fromiter(
+            chain.from_iterable(tokens), dtype=object, count=lengths.sum()
+        )
+        codes, uniques = pd.factorize(flat)
+
+        # Process each distinct token once (None for junk), then intern the chords,
+        # distinct raw tokens can homogenize to the same chord. Junk is coded -1.
+        if self._counts is None:
+            verdicts = [self._process_token(token) for token in uniques]
+        else:
+            # Outcomes are counted per occurrence, as row by row
+            occurrences = np.bincount(codes, minlength=len(uniques)).tolist()
+            verdicts = [
+                self._process_token(token, n)
+                for token, n in zip(uniques, occurrences)
+            ]
+        verdicts = np.array(verdicts, dtype=object)
+        chord_codes, vocab = pd.factorize(verdicts)
+
+        # Drop junk and rebuild the row offsets
+        ids = chord_codes[codes]
+        keep = ids >= 0
+        row_ids = np.repeat(np.arange(n_rows), lengths)[keep]
+        offsets = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_ids, minlength=n_rows), out=offsets[1:])
+
+        return EncodedCorpus(vocab.tolist(), ids[keep], offsets)
+
+    def isolate_parallel(
+        self, series: pd.Series, workers=None, chunksize=10_000, pool=None
+    ) -> pd.Series:
+        """
+        Shard rows across a process pool, row order is preserved.
+        Every worker starts from a copy of this instance's verdict cache and sends back the
+        verdicts it added, which are merged into `_cached_tokens` when the run ends.
+
+        Args:
+            series: Raw song texts
+            workers: Number of processes, defaults to the number of CPUs
+            chunksize: Number of rows per task
+            pool: Pool from `process_pool`, reused across calls instead of starting a new one
+        """
+        texts = series.tolist()
+        chunks = [
+            texts[i : i + chunksize] for i in range(0, len(texts), chunksize)
+        ]
+
+        if pool is None:
+            with self.process_pool(workers) as pool:
+                results = list(pool.map(_isolate_chunk, chunks))
+        else:
+            results = list(pool.map(_isolate_chunk, chunks))
+
+        rows = []
+        for chunk_rows, verdicts in results:
+            rows.extend(chunk_rows)
+            for token, verdict in verdicts.items():
+                self._cached_tokens[token] = verdict
+
+        return pd.Series(
+            rows, index=series.index, name=series.name, dtype=object
+        )
+
+    def process_pool(self, workers=None) -> ProcessPoolExecutor:
+        """
+        Process pool for `isolate_parallel`, whose workers are seeded once with a copy of this
+        instance's configuration and verdict cache and keep their cache across calls.
+        """
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                type(self),
+                self.char_threshold,
+                self.engine,
+                self._cached_tokens,
+                self._accept,
+            ),
+        )
+
+    def stats(self) -> dict:
+        """
+        Token counts per outcome and accumulated seconds per stage.
+        Counts are token occurrences, also through `isolate_series`/`isolate_encoded`, which
+        process every distinct token once: the repeats of a newly validated (or invalid) token
+        count as cache hits, as they would row by row. Seconds are the time actually spent.
+        Requires `instrument=True`.
+        """
+        if self._counts is None:
+            raise RuntimeError(
+                "Instrumentation is disabled, use ChordIsolator(instrument=True)!"
+            )
+
+        return {
+            "tokens": sum(self._counts.values()),
+            "counts": dict(self._counts),
+            "seconds": dict(self._seconds),
+        }
+
+    def reset_stats(self):
+        self._counts = dict.fromkeys(self.STAT_OUTCOMES, 0)
+        self._seconds = dict.fromkeys(self.STAT_STAGES, 0.0)
+
+    def cache_stats(self) -> dict:
+        """Hits, misses, evictions and size of the verdict cache"""
+        return self._cached_tokens.stats()
+
+    def save_cache(self, path="cached_tokens.sqlite", append=False):
+        """
+        Persist the verdict cache to a SQLite file, keyed by the fingerprint of `_chord_regex`.
+        With `append`, only verdicts added since the last save/load are written (checkpointing).
+        """
+        save_verdicts(
+            self._cached_tokens,
+            path,
+            "isolator",
+            self._fingerprint(),
+            append=append,
+        )
+
+    def load_cache(self, path="cached_tokens.sqlite") -> int:
+        """
+        Warm-start the verdict cache from a file written by `save_cache`.
+        Verdicts produced by a different `_chord_regex` are ignored.
+        """
+        return load_verdicts(
+            self._cached_tokens, path, "isolator", self._fingerprint()
         )
-        df.index.name = "chord"
-        df.reset_index(inplace=True)
-        df.to_csv("cached_tokens.csv")
 
     # Private Methods ----
 
+    def _fingerprint(self) -> str:
+        """
+        Version of the cached verdicts, changes whenever the chord regex does.
+        The fused engine also caches length rejections, hence the threshold.
+        """
+        return fingerprint(
+            self._chord_regex.pattern,
+            self._chord_regex.flags,
+            self.char_threshold,
+        )
+
     # Tokenize ----
     def _tokenize(self, txt: str) -> list:
         """Split by coma and rm leading, trailing, and excess whitespaces, i.e. n > 1"""
-        split_symbol_pattern = r"(?<=\S)[,^%]{1}(?=\S)"
-        txt = re.sub(split_symbol_pattern, " ", txt)
-        txt = re.sub(r"\s+", " ", txt)
+        txt = self.SPLIT_SYMBOL_REGEX.sub(" ", txt)
+        txt = self.WHITESPACE_REGEX.sub(" ", txt)
         txt = txt.strip()
         return txt.split(" ")
 
-    # Process list of tokens ----
+    def _tokenize_series(self, series: pd.Series) -> pd.Series:
+        """
+        Vectorized `_tokenize` over a whole column, returns a Series of token lists.
+        Blank rows give an empty list instead of `[""]`, which erodes to nothing anyway.
+        """
+        series = series.str.replace(self.SPLIT_SYMBOL_REGEX, " ", regex=True)
+        return series.str.split()
 
-    def _process_tokens(self, tokens: str) -> list:
+    # Fused engine ----
+    def _scan(self, txt: str) -> list:
+        """
+        Single-pass equivalent of `_process_tokens(_tokenize(txt))`.
+        Rejected tokens are cached as junk as well, since the fused pattern decides both at once.
+        """
         chords = []
+        cache = self._cached_tokens
+        accept = self._accept
+        charset = self._charset
 
-        for token in tokens:
-            token = self._erode(token)
-
+        for token in self.SCAN_REGEX.findall(txt):
             if not token:
-                # print("Empty token")
                 continue
 
-            token = self._homogenize(token)
+            if not token.isascii():
+                token = token.translate(self.HOMOGENIZE_TABLE)
 
-            cached = self._cached_tokens.get(token)
+            token = token.rstrip("*~,/")
 
-            if cached is not None:
-                # print(f"{token} already in cache!")
-                if cached:
-                    chords.append(token)
-                    continue
-                else:
-                    # Since token is junk, skip validation!
+            if token in accept:
+                chords.append(token)
+                continue
+
+            verdict = cache.get(token)
+
+            if verdict is None:
+                if "(" not in token and not charset.issuperset(token):
                     continue
 
-            if self._reject(token):
-                # print(f"{token} rejected!")
-                continue
+                verdict = self._fused_regex.match(token) is not None
+                cache[token] = verdict
 
-            if self._validate(token):
-                # print(f"{token} validated and cached!")
-                self._cached_tokens[token] = True
+            if verdict:
                 chords.append(token)
-            else:
-                # print(f"{token} added to cache as junk")
-                self._cached_tokens[token] = False
 
         return chords
 
+    # Process list of tokens ----
+
+    def _process_tokens(self, tokens: list) -> list:
+        chords = []
+
+        for token in tokens:
+            chord = self._process_token(token)
+
+            if chord is not None:
+                chords.append(chord)
+
+        return chords
+
+    def _process_token(self, token: str) -> Optional[str]:
+        """Return the homogenized token if it is a chord, otherwise None"""
+        token = self._erode(token)
+
+        if not token:
+            # print("Empty token")
+            return None
+
+        token = self._homogenize(token)
+
+        if token in self._accept:
+            return token
+
+        cached = self._cached_tokens.get(token)
+
+        if cached is not None:
+            # print(f"{token} already in cache!")
+            # Junk tokens skip validation!
+            return token if cached else None
+
+        if self._reject(token):
+            # print(f"{token} rejected!")
+            return None
+
+        if self._reject_charset(token):
+            # Cheap to recompute, so not cached
+            return None
+
+        if self._validate(token):
+            # print(f"{token} validated and cached!")
+            self._cached_tokens[token] = True
+            return token
+
+        # print(f"{token} added to cache as junk")
+        self._cached_tokens[token] = False
+        return None
+
+    def _process_token_instrumented(self, token: str, n=1) -> Optional[str]:
+        """
+        `_process_token` with per-outcome counters and per-stage timers.
+        The outcome is counted `n` times, for a token occurring `n` times.
+        """
+        counts = self._counts
+        seconds = self._seconds
+        clock = time.perf_counter
+
+        t0 = clock()
+        token = self._erode(token)
+        t1 = clock()
+        seconds["erode"] += t1 - t0
+
+        if not token:
+            counts["eroded_empty"] += n
+            return None
+
+        token = self._homogenize(token)
+        t2 = clock()
+        seconds["homogenize"] += t2 - t1
+
+        accepted = token in self._accept
+        t2a = clock()
+        seconds["fast_accept"] += t2a - t2
+
+        if accepted:
+            counts["fast_accept"] += n
+            return token
+
+        cached = self._cached_tokens.get(token)
+        t3 = clock()
+        seconds["cache"] += t3 - t2a
+
+        if cached is not None:
+            counts["cache_hit_valid" if cached else "cache_hit_junk"] += n
+            return token if cached else None
+
+        too_long = len(token) >= self.char_threshold
+        rejected = too_long or self._reject(token)
+        t4 = clock()
+        seconds["reject"] += t4 - t3
+
+        if rejected:
+            counts["rejected_long" if too_long else "rejected_tab"] += n
+            return None
+
+        if self._reject_charset(token):
+            seconds["validate"] += clock() - t4
+            counts["rejected_charset"] += n
+            return None
+
+        valid = self._validate(token)
+        seconds["validate"] += clock() - t4
+
+        if valid:
+            counts["validated"] += 1
+            counts["cache_hit_valid"] += n - 1
+            self._cached_tokens[token] = True
+            return token
+
+        counts["invalid"] += 1
+        counts["cache_hit_junk"] += n - 1
+        self._cached_tokens[token] = False
+        return None
+
     # Cleaning functions ----
     def _erode(self, token: str) -> str:
         """
@@ -143,6 +589,10 @@ class ChordIsolator:
 
         return False
 
+    def _reject_charset(self, token: str) -> bool:
+        """Predicate that rejects tokens with characters the chord grammar never contains"""
+        return "(" not in token and not self._charset.issuperset(token)
+
     def _validate(self, token: str) -> Optional[re.Match[str]]:
         """
         Validate whether the tokens follow an approximate chord structure
@@ -150,3 +600,63 @@ class ChordIsolator:
         return self._chord_regex.match(token)
 
 
+# Process pool workers ----
+_worker_isolator = None
+
+
+def _init_worker(cls, char_threshold, engine, cache, accept_table):
+    """Build the process-local isolator, seeded with the parent's verdict cache"""
+    global _worker_isolator
+
+    _worker_isolator = cls(
+        char_threshold=char_threshold,
+        cache=cache,
+        engine=engine,
+        accept_table=accept_table,
+    )
+    cache.track_changes()
+
+
+def _isolate_chunk(texts: list) -> tuple:
+    """Isolate a chunk of rows, returns the rows and the verdicts added meanwhile"""
+    iso = _worker_isolator
+    rows = iso.isolate_series(pd.Series(texts, dtype=object)).tolist()
+    return rows, iso._cached_tokens.drain_changes()
+
+
+# Fast accept table ----
+@lru_cache
+def load_accept_table(path=ACCEPT_TABLE_PATH) -> tuple:
+    """Chord spellings of an accept table file, one per line, most frequent first"""
+    with open(path, encoding="utf-8") as f:
+        return tuple(line.strip() for line in f if line.strip())
+
+
+# Root spellings and suffixes of the diatonic triads and sevenths, which lead every corpus.
+# Half-diminished is spelled "m7-5", the chord grammar has no "b5".
+SEED_ROOTS = "C C# Db D D# Eb E F F# Gb G G# Ab A A# Bb B".split()
+SEED_SUFFIXES = ("", "m", "dim", "7", "maj7", "m7", "m7-5")
+
+
+def seed_chords() -> list:
+    """Diatonic triads and sevenths on every root spelling, e.g. "C", "Em", "G7", "Bm7-5" """
+    return [root + suffix for suffix in SEED_SUFFIXES for root in SEED_ROOTS]
+
+
+def build_accept_table(
+    texts: pd.Series, path=ACCEPT_TABLE_PATH, top_n=1_000, seed=()
+) -> list:
+    """
+    Write the `top_n` most frequent chords isolated from a corpus of raw song texts,
+    e.g. `build_accept_table(ds["chords_str"], seed=seed_chords())`, to an accept table file.
+    The `seed` chords come first, whatever their frequency in the corpus.
+    """
+    iso = ChordIsolator(accept_table=[])
+    counts = iso.isolate_encoded(texts).token_counts()
+    chords = list(dict.fromkeys([*seed, *counts.index[:top_n].tolist()]))
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(chords) + "\n")
+
+    load_accept_table.cache_clear()
+    return chords
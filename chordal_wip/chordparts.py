@@ -0,0 +1,66 @@
+import re
+from typing import NamedTuple, Optional
+
+# Mirrors `ChordCanonizer._reconstruct`, e.g. "Eb(q:maj)(m:add9)(e:7)/G"
+CANONICAL_REGEX = re.compile(
+    r"""
+    ^(?P<root>[A-G][#b]?)
+    (?:\(q:(?P<quality>[^)]*)\))?
+    (?:\(m:(?P<adds>[^)]*)\))?
+    (?:\(s:(?P<sus>[^)]*)\))?
+    (?P<dominant>\(d:True\))?
+    (?:\(e:(?P<extensions>[^)]*)\))?
+    (?:\(a:(?P<alterations>[^)]*)\))?
+    (?:/(?P<slash>[^(]+))?
+    (?:\(u:(?P<unclear>[^)]*)\))?$
+    """,
+    re.VERBOSE,
+)
+
+
+class ChordParts(NamedTuple):
+    """
+    Immutable decomposition of a chord, see `ChordCanonizer._decompose`.
+
+    Modifier lists are tuples, so parts are hashable (usable as cache keys), compare by value
+    and take no per-instance dict (tuples are slotted).
+    """
+
+    root: Optional[str] = None
+    quality: Optional[str] = None
+    adds: tuple = ()
+    sus: Optional[str] = None
+    dominant: Optional[bool] = None
+    extensions: tuple = ()
+    alterations: tuple = ()
+    slash: Optional[str] = None
+    unclear: tuple = ()
+
+    @classmethod
+    def from_canonical(cls, chord: str) -> "ChordParts":
+        """
+        Parse a canonical chord back into its parts.
+        An augmented quality is not kept in the canonical form, it comes back as None.
+        """
+        match = CANONICAL_REGEX.match(chord)
+
+        if not match:
+            raise ValueError(f"Invalid canonical chord: {chord}.")
+
+        fields = match.groupdict()
+
+        return cls(
+            root=fields["root"],
+            quality=fields["quality"],
+            adds=_split(fields["adds"]),
+            sus=fields["sus"],
+            dominant=True if fields["dominant"] else None,
+            extensions=_split(fields["extensions"]),
+            alterations=_split(fields["alterations"]),
+            slash=fields["slash"],
+            unclear=_split(fields["unclear"]),
+        )
+
+
+def _split(group: Optional[str]) -> tuple:
+    return tuple(group.split(",")) if group else ()
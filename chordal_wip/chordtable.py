@@ -0,0 +1,180 @@
+import json
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+import pandas as pd
+from chordal_wip.chordparts import ChordParts
+from chordal_wip.encoded import EncodedCorpus
+from chordal_wip.helpers import import_pyarrow
+
+# Raw chord, its canonical form ("X" if it cannot be canonicalized) and the canonical parts.
+# Modifier tuples are comma-joined, missing fields are empty strings.
+COLUMNS = (
+    "raw",
+    "canonical",
+    "root",
+    "quality",
+    "adds",
+    "sus",
+    "dominant",
+    "extensions",
+    "alterations",
+    "slash",
+    "unclear",
+)
+
+META_FILE = "meta.json"
+
+
+class ChordTable:
+    """
+    Columnar raw -> canonical chord table, see `ChordCanonizer.export_table`.
+
+    Columns are NumPy arrays sorted by raw chord, so lookups are a vectorized binary search.
+    Saved as a directory of .npy files (one per column, fixed-width strings) that load
+    memory-mapped, or as a single Parquet file (requires pyarrow).
+    """
+
+    def __init__(self, columns: dict, fingerprint: str):
+        self.columns = columns
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_canonizer(cls, canonizer) -> "ChordTable":
+        """Table of every chord memoized by a `ChordCanonizer`"""
+        rows = []
+
+        for raw, canonical in canonizer._cached_chords.items():
+            parts = (
+                _canonical_parts(canonizer, canonical) if canonical else None
+            )
+            rows.append(_table_row(raw, canonical or "X", parts))
+
+        rows.sort()
+        columns = {
+            name: np.array(values, dtype=bool if name == "dominant" else str)
+            for name, values in zip(
+                COLUMNS, zip(*rows) if rows else [()] * len(COLUMNS)
+            )
+        }
+
+        return cls(columns, canonizer._fingerprint())
+
+    @classmethod
+    def load(cls, path, mmap=True) -> "ChordTable":
+        """Load a table written by `save`, .npy columns are memory-mapped unless `mmap` is False"""
+        path = Path(path)
+
+        if path.suffix == ".parquet":
+            _, parquet = import_pyarrow()
+            table = parquet.read_table(path, memory_map=mmap)
+            fingerprint = table.schema.metadata[b"fingerprint"].decode()
+            columns = {name: table.column(name).to_numpy() for name in COLUMNS}
+            return cls(columns, fingerprint)
+
+        meta = json.loads((path / META_FILE).read_text())
+        columns = {
+            name: np.load(
+                path / f"{name}.npy", mmap_mode="r" if mmap else None
+            )
+            for name in meta["columns"]
+        }
+
+        return cls(columns, meta["fingerprint"])
+
+    # Public Methods ----
+    def save(self, path):
+        """Write to a .parquet file, or to a directory of .npy columns for any other path"""
+        path = Path(path)
+
+        if path.suffix == ".parquet":
+            pa, parquet = import_pyarrow()
+            table = pa.Table.from_pandas(self.to_frame(), preserve_index=False)
+            table = table.replace_schema_metadata(
+                {"fingerprint": self.fingerprint}
+            )
+            parquet.write_table(table, path)
+            return
+
+        path.mkdir(parents=True, exist_ok=True)
+        for name, values in self.columns.items():
+            np.save(path / f"{name}.npy", values)
+
+        meta = {
+            "fingerprint": self.fingerprint,
+            "columns": list(self.columns),
+            "n_rows": len(self),
+        }
+        (path / META_FILE).write_text(json.dumps(meta))
+
+    def lookup(self, chords: Iterable[str], column="canonical", missing=None):
+        """
+        Values of `column` for raw chords, `missing` for chords not in the table.
+        Vectorized over the chords, the table is never scanned.
+        """
+        chords = np.asarray(chords, dtype=str)
+        raw = self.columns["raw"]
+        values = self.columns[column]
+
+        if not len(raw):
+            return np.full(len(chords), missing, dtype=object)
+
+        idx = np.searchsorted(raw, chords).clip(max=len(raw) - 1)
+        found = raw[idx] == chords
+
+        result = np.asarray(values[idx], dtype=object)
+        result[~found] = missing
+        return result
+
+    def join_encoded(
+        self, corpus: EncodedCorpus, column="canonical", missing="X"
+    ) -> EncodedCorpus:
+        """Replace the chords of an `EncodedCorpus` by their `column` value, vocabulary only"""
+        looked_up = self.lookup(corpus.vocab, column=column, missing=missing)
+        mapping, vocab = pd.factorize(looked_up)
+        return corpus.map_vocab(vocab.tolist(), mapping)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {name: np.asarray(v) for name, v in self.columns.items()}
+        )
+
+    def items(self):
+        """(raw, canonical or False) pairs, in the memo format of `ChordCanonizer`"""
+        for raw, canonical in zip(
+            self.columns["raw"].tolist(), self.columns["canonical"].tolist()
+        ):
+            yield raw, canonical if canonical != "X" else False
+
+    def __len__(self):
+        return len(self.columns["raw"])
+
+    def __repr__(self):
+        return f"ChordTable(rows={len(self)}, fingerprint={self.fingerprint})"
+
+
+def _canonical_parts(canonizer, canonical: str) -> ChordParts:
+    try:
+        return ChordParts.from_canonical(canonical)
+    except ValueError:
+        # Not in canonical notation (e.g. the edge case "Em13"), parse it from scratch
+        return canonizer._normalize(canonizer._decompose(canonical))
+
+
+def _table_row(raw: str, canonical: str, parts) -> tuple:
+    if parts is None:
+        return (raw, canonical, "", "", "", "", False, "", "", "", "")
+
+    return (
+        raw,
+        canonical,
+        parts.root or "",
+        parts.quality or "",
+        ",".join(parts.adds),
+        parts.sus or "",
+        bool(parts.dominant),
+        ",".join(parts.extensions),
+        ",".join(parts.alterations),
+        parts.slash or "",
+        ",".join(parts.unclear),
+    )
@@ -0,0 +1,110 @@
+from itertools import chain
+from typing import Iterable
+import numpy as np
+import pandas as pd
+
+
+class EncodedCorpus:
+    """
+    Integer-encoded corpus of chord tokens in CSR layout:
+        - vocab: Interned chord spellings shared by all songs
+        - ids: Flat int32 array of token ids (positions in `vocab`)
+        - offsets: Song i spans `ids[offsets[i]:offsets[i + 1]]`
+
+    Offsets are int64, so corpora with more than 2**31 tokens still fit.
+    """
+
+    def __init__(self, vocab: list, ids, offsets):
+        self.vocab = list(vocab)
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def from_token_lists(cls, rows: Iterable[list]) -> "EncodedCorpus":
+        """Encode an iterable of token lists, e.g. `series.str.split()`"""
+        vocab_index = {}
+        ids = []
+        offsets = [0]
+
+        for tokens in rows:
+            for token in tokens:
+                ids.append(vocab_index.setdefault(token, len(vocab_index)))
+            offsets.append(len(ids))
+
+        return cls(list(vocab_index), ids, offsets)
+
+    @classmethod
+    def from_strings(cls, series: Iterable[str]) -> "EncodedCorpus":
+        """Encode space-joined rows, e.g. the output of `raw_chord_isolation`"""
+        return cls.from_token_lists(txt.split() for txt in series)
+
+    @classmethod
+    def from_series(cls, series: pd.Series, sep=" ") -> "EncodedCorpus":
+        """
+        Vectorized encoding of a Series of `sep`-joined rows, splitting exactly on `sep`
+        (unlike `from_strings`, empty tokens are kept so rows decode back unchanged).
+        Token ids are the codes of `pd.factorize`, in order of first appearance.
+        """
+        tokens = series.str.split(sep)
+
+        # Flatten rows and code every token by the position of its distinct value
+        lengths = tokens.str.len().to_numpy(dtype=np.int64)
+        flat = np.fromiter(
+            chain.from_iterable(tokens), dtype=object, count=lengths.sum()
+        )
+        codes, vocab = pd.factorize(flat)
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        return cls(vocab.tolist(), codes, offsets)
+
+    # Public Methods ----
+    @property
+    def n_songs(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def song_ids(self) -> np.ndarray:
+        """Song index of every token, aligned with `ids`"""
+        return np.repeat(np.arange(self.n_songs), self.lengths)
+
+    def tokens(self, i: int) -> list:
+        ids = self.ids[self.offsets[i] : self.offsets[i + 1]]
+        return [self.vocab[token_id] for token_id in ids]
+
+    def token_counts(self) -> pd.Series:
+        """Corpus-wide count per vocabulary entry, most frequent first"""
+        counts = np.bincount(self.ids, minlength=len(self.vocab))
+        return pd.Series(counts, index=self.vocab).sort_values(
+            ascending=False, kind="stable"
+        )
+
+    def to_strings(self) -> list:
+        """Decode into space-joined rows"""
+        tokens = np.array(self.vocab, dtype=object)[self.ids].tolist()
+        offsets = self.offsets.tolist()
+
+        return [
+            " ".join(tokens[offsets[i] : offsets[i + 1]])
+            for i in range(self.n_songs)
+        ]
+
+    def map_vocab(self, new_vocab: list, mapping) -> "EncodedCorpus":
+        """
+        Re-encode through a vocabulary-level mapping, `mapping[old_id]` being the new id.
+        Only the vocabulary is touched by the caller, the token arrays are remapped in bulk.
+        """
+        mapping = np.asarray(mapping, dtype=np.int32)
+        return EncodedCorpus(new_vocab, mapping[self.ids], self.offsets)
+
+    def __len__(self):
+        return self.n_songs
+
+    def __repr__(self):
+        return (
+            f"EncodedCorpus(songs={self.n_songs}, tokens={len(self.ids)}, "
+            f"vocab={len(self.vocab)})"
+        )
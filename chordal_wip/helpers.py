@@ -25,3 +25,21 @@ def rotate_list(arr, n, dir="left"):
         return np.concatenate((arr[-n:], arr[:-n]))
     else:
         raise ValueError("Direction must be 'left' or 'right'!")
+
+
+def import_pyarrow():
+    """
+    Import pyarrow for Parquet files, with an install hint if it is missing.
+
+    Returns:
+        The pyarrow and pyarrow.parquet modules
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet files require pyarrow, install it with `pip install pyarrow`."
+        ) from e
+
+    return pa, parquet
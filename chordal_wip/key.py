@@ -1,8 +1,17 @@
+from __future__ import annotations
+import math
 from collections import Counter
-from pytest import approx
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional, Union
+import numpy as np
 from chordal_wip.helpers import rotate_list
-import chordal_wip.scales as scales
-import pandas as pd
+from chordal_wip.trace import Tracer
+
+# pandas (and the reference scales built with it) are only imported when needed, so a saved
+# `KeyModel` predicts with NumPy alone
+if TYPE_CHECKING:
+    import pandas as pd
+    from chordal_wip.encoded import EncodedCorpus
 
 
 class KeyPredictor:
@@ -10,8 +19,14 @@ class KeyPredictor:
     A class for predicting key from a chord progression.
     """
 
-    def __init__(self, chord_txt: str, reference: pd.DataFrame):
+    def __init__(
+        self,
+        chord_txt: str,
+        reference: pd.DataFrame,
+        tracer: Optional[Tracer] = None,
+    ):
         self.chord_txt = chord_txt
+        self.tracer = tracer
         self.chord_progression = self._chord_progression()
         self.n_chords = len(self.chord_progression)
         self.chord_counts = self._count_chords()
@@ -28,6 +43,8 @@ class KeyPredictor:
         return [chord for chord in chord_lst if "/" not in chord]
 
     def _count_chords(self) -> pd.Series:
+        import pandas as pd
+
         counts_unsorted = pd.Series(Counter(self.chord_progression))
         return self._sort_chords(counts_unsorted)
 
@@ -37,7 +54,7 @@ class KeyPredictor:
     def _integrity_proportions(self):
         sum_to_one = self.chord_proportions.sum()
 
-        if sum_to_one != approx(1.0):
+        if not math.isclose(sum_to_one, 1.0, rel_tol=1e-6, abs_tol=1e-12):
             raise ValueError(f"Proportions do not sum to 1, got {sum_to_one}")
 
     def _sort_chords(self, counts_unsorted: pd.Series) -> pd.Series:
@@ -57,15 +74,43 @@ class KeyPredictor:
 
     def _calculate_scores(self) -> pd.Series:
         """Vectorized calculation of scores for all scales in reference."""
+        import pandas as pd
+        from chordal_wip import scales
+
+        # Compiled weight-matrix of all scales (rows) and all chords (cols)
+        compiled = scales.get_compiled_ref_scales(self.reference)
+
+        # Multiply the chord freqs (progression) with the weights of the chords in the references
+        columns = np.array(
+            [
+                compiled.chord_index.get(c, -1)
+                for c in self.chord_proportions.index
+            ],
+            dtype=np.intp,
+        )
+        known = columns >= 0
+
+        # Weights and counts are small integers, so float32 sums are exact and ties stay ties
+        counts = self.chord_counts.to_numpy(dtype=np.float32)
+        scores = pd.Series(
+            compiled.score(columns[known], counts[known]) / self.n_chords,
+            index=self.reference.index,
+        )
 
-        # Creates a weight-matrix of all scales (rows) and all chords (cols)
-        weights_df = pd.DataFrame.from_records(self.reference["chord_weights"])
+        if self.tracer is not None and self.tracer.begin():
+            self.tracer.emit(
+                "key_scores",
+                chords=self.chord_proportions.to_dict(),
+                scores=[
+                    {"key": key, "mode": mode, "scores": score}
+                    for key, mode, score in zip(
+                        compiled.keys.tolist(),
+                        compiled.modes.tolist(),
+                        scores.tolist(),
+                    )
+                ],
+            )
 
-        # Multiply the chord freqs (progression) with the weights of the references
-        scores = (weights_df.mul(self.chord_proportions, axis=1)).sum(axis=1)
-        ref = self.reference
-        ref["scores"] = scores.values
-        print(ref)
         return scores
 
     def __str__(self):
@@ -75,6 +120,358 @@ class KeyPredictor:
         )
 
 
+class KeyPredictions(NamedTuple):
+    """Best matching scale per song, songs without chords have empty key and mode and a NaN score"""
+
+    keys: np.ndarray
+    modes: np.ndarray
+    scores: np.ndarray
+
+
+class KeyModel:
+    """
+    Key predictor fitted once from reference scales and reused for every progression.
+
+    Predictions match `KeyPredictor(txt, reference).top_scale` and only need NumPy, a model
+    written with `save` loads and predicts without pandas.
+    """
+
+    def __init__(
+        self, weights: np.ndarray, chords: Iterable[str], keys, modes
+    ):
+        """
+        Args:
+            weights: (scales x chords) weight matrix, see `scales.RefScales`
+            chords: Chord of every column of `weights`
+            keys, modes: Key and mode of every row of `weights`
+        """
+        chords = list(chords)
+        n_scales, n_known = np.shape(weights)
+
+        # Chords missing from the reference go to an extra zero-weight row, so they still
+        # count in the proportions
+        self._weights = np.zeros((n_known + 1, n_scales), dtype=np.float32)
+        self._weights[:n_known] = np.asarray(weights).T
+        self._weights.flags.writeable = False
+        self._chord_index = {chord: i for i, chord in enumerate(chords)}
+        self._unknown = n_known
+
+        self.chords = tuple(chords)
+        self.keys = tuple(np.asarray(keys, dtype=str).tolist())
+        self.modes = tuple(np.asarray(modes, dtype=str).tolist())
+
+    @classmethod
+    def fit(
+        cls, reference: Optional[pd.DataFrame] = None, **config
+    ) -> "KeyModel":
+        """Model of a reference scales frame, by default of `scales.get_ref_scales(**config)`"""
+        from chordal_wip import scales
+
+        compiled = scales.get_compiled_ref_scales(reference, **config)
+        chords = sorted(compiled.chord_index, key=compiled.chord_index.get)
+        return cls(compiled.weights, chords, compiled.keys, compiled.modes)
+
+    @classmethod
+    def load(cls, path) -> "KeyModel":
+        with np.load(path) as data:
+            return cls(
+                data["weights"],
+                data["chords"].tolist(),
+                data["keys"],
+                data["modes"],
+            )
+
+    # Public Methods ----
+    def save(self, path):
+        """Write the model to a NumPy .npz archive"""
+        np.savez(
+            path,
+            weights=self._weights[:-1].T,
+            chords=np.array(self.chords, dtype=str),
+            keys=np.array(self.keys, dtype=str),
+            modes=np.array(self.modes, dtype=str),
+        )
+
+    def predict(self, tokens: Union[str, Iterable[str]]) -> tuple:
+        """
+        (key, mode, score) of a progression, given as space-joined chords or a list of chords.
+        Slash chords and empty tokens are ignored, a progression without chords (e.g. "")
+        gives ("", "", nan).
+        """
+        if isinstance(tokens, str):
+            tokens = tokens.split(" ")
+
+        index = self._chord_index
+        unknown = self._unknown
+        cols = [
+            index.get(chord, unknown)
+            for chord in tokens
+            if chord and "/" not in chord
+        ]
+
+        if not cols:
+            return "", "", math.nan
+
+        # Weights are small integers, so float32 sums are exact and ties stay ties
+        raw_scores = self._weights[cols].sum(axis=0)
+        best = int(raw_scores.argmax())
+
+        return (
+            self.keys[best],
+            self.modes[best],
+            float(raw_scores[best]) / len(cols),
+        )
+
+    def predict_encoded(
+        self, corpus: EncodedCorpus, block_size=100_000
+    ) -> KeyPredictions:
+        """
+        `predict` for every song of an `EncodedCorpus`.
+
+        Chords are mapped to weight rows once per vocabulary entry, then the songs x chords
+        count matrix is built with one `np.bincount` per block of `block_size` songs and
+        multiplied by the weight matrix, so memory is bounded by the block size.
+        """
+        weights = self._weights
+        n_cols = len(weights)
+
+        # Slash chords and the empty token of songs without chords are dropped (-1)
+        index = self._chord_index
+        unknown = self._unknown
+        vocab_cols = np.array(
+            [
+                -1 if not chord or "/" in chord else index.get(chord, unknown)
+                for chord in corpus.vocab
+            ],
+            dtype=np.intp,
+        )
+        cols = vocab_cols[corpus.ids]
+
+        n_songs = corpus.n_songs
+        best = np.zeros(n_songs, dtype=np.intp)
+        scores = np.full(n_songs, np.nan)
+        lengths = corpus.lengths
+
+        for start in range(0, n_songs, block_size):
+            stop = min(start + block_size, n_songs)
+            n_block = stop - start
+            block_cols = cols[corpus.offsets[start] : corpus.offsets[stop]]
+            rows = np.repeat(np.arange(n_block), lengths[start:stop])
+
+            kept = block_cols >= 0
+            counts = np.bincount(
+                rows[kept] * n_cols + block_cols[kept],
+                minlength=n_block * n_cols,
+            ).reshape(n_block, n_cols)
+
+            # Weights and counts are small integers, so float32 sums are exact and ties stay ties
+            raw_scores = counts.astype(np.float32) @ weights
+            n_chords = counts.sum(axis=1)
+            block_best = raw_scores.argmax(axis=1)
+
+            best[start:stop] = block_best
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scores[start:stop] = (
+                    raw_scores[np.arange(n_block), block_best] / n_chords
+                )
+
+        empty = np.isnan(scores)
+        keys = np.array(self.keys, dtype=str)[best]
+        modes = np.array(self.modes, dtype=str)[best]
+        keys[empty] = ""
+        modes[empty] = ""
+
+        return KeyPredictions(keys, modes, scores)
+
+    def __repr__(self):
+        return f"KeyModel(scales={len(self.keys)}, chords={len(self.chords)})"
+
+
+def predict_keys(
+    songs: Union[pd.Series, EncodedCorpus],
+    reference: Optional[pd.DataFrame] = None,
+    block_size=100_000,
+) -> KeyPredictions:
+    """
+    Batch equivalent of `KeyPredictor(txt, reference).top_scale` over a whole corpus,
+    see `KeyModel.predict_encoded`.
+
+    Args:
+        songs: Space-joined chord rows, or an `EncodedCorpus` of them
+        reference: Reference scales frame, e.g. `scales.get_ref_scales(modes=scales.MODES)`.
+            Default `scales.get_ref_scales()`
+    """
+    from chordal_wip.encoded import EncodedCorpus
+
+    if not isinstance(songs, EncodedCorpus):
+        import pandas as pd
+
+        songs = EncodedCorpus.from_series(pd.Series(songs))
+
+    return KeyModel.fit(reference).predict_encoded(
+        songs, block_size=block_size
+    )
+
+
+# Pitch-class profiles ----
+PROFILES = ("pitch_class", "root")
+
+
+def pitch_class_profiles(
+    songs: Union[pd.Series, EncodedCorpus],
+    profile="pitch_class",
+    block_size=1_000,
+) -> np.ndarray:
+    """
+    (songs x 12) profile of every song, bin i being pitch class i of `Scale.ALL_NOTES` (C = 0).
+    A "pitch_class" profile counts the tones of every chord, a "root" profile counts chord roots.
+    Chords are encoded through `get_pitch_class_table()`, so enharmonic spellings ("Db", "C#")
+    fall in the same bins. Chords without encoding (e.g. "X") are left out.
+
+    As in `KeyModel.predict_encoded`, the songs x chords count matrix is built with one
+    `np.bincount` per block of `block_size` songs and multiplied by the chord profiles, so memory
+    is bounded by the block size times the number of encoded chords.
+    """
+    if profile not in PROFILES:
+        raise ValueError(
+            f"Invalid profile: {profile}. Must be one of {list(PROFILES)}."
+        )
+
+    import pandas as pd
+    from chordal_wip.encoded import EncodedCorpus
+    from chordal_wip.pitchclass import get_pitch_class_table
+
+    if not isinstance(songs, EncodedCorpus):
+        songs = EncodedCorpus.from_series(pd.Series(songs))
+
+    # Profile of every vocabulary entry
+    encoded = get_pitch_class_table().encode(songs.vocab).astype(np.intp)
+    known = (encoded[:, 0] >= 0)[:, None]
+    bins = np.arange(12)
+
+    if profile == "root":
+        vocab_profiles = (encoded[:, :1] == bins) & known
+    else:
+        vocab_profiles = (encoded[:, 2:] >> bins & 1).astype(bool) & known
+
+    # Only encoded chords get a column, the others are dropped (-1)
+    known = known[:, 0]
+    n_cols = int(known.sum())
+    vocab_cols = np.where(known, np.cumsum(known) - 1, -1)
+    chord_profiles = vocab_profiles[known].astype(np.float64)
+
+    n_songs = songs.n_songs
+    profiles = np.zeros((n_songs, 12))
+    lengths = songs.lengths
+
+    for start in range(0, n_songs, block_size):
+        stop = min(start + block_size, n_songs)
+        n_block = stop - start
+        block_ids = songs.ids[songs.offsets[start] : songs.offsets[stop]]
+        block_cols = vocab_cols[block_ids]
+        rows = np.repeat(np.arange(n_block), lengths[start:stop])
+
+        kept = block_cols >= 0
+        counts = np.bincount(
+            rows[kept] * n_cols + block_cols[kept],
+            minlength=n_block * n_cols,
+        ).reshape(n_block, n_cols)
+
+        profiles[start:stop] = counts @ chord_profiles
+
+    return profiles
+
+
+@lru_cache
+def mode_templates(
+    modes=("ionian", "aeolian"),
+    chord_type="triads",
+    weights=None,
+    profile="pitch_class",
+) -> np.ndarray:
+    """
+    (modes x 12) profiles of the weighted diatonic chords of every mode in the key of C, taken
+    from `scales.get_ref_scales(modes, chord_type, weights)`. Read-only, built once per configuration.
+    """
+    from chordal_wip import scales
+    from chordal_wip.encoded import EncodedCorpus
+
+    if weights is None:
+        weights = scales.DEGREE_WEIGHTS
+
+    reference = scales.get_ref_scales(modes, chord_type, weights)
+    chord_weights = reference.loc[reference["key"] == "C", "chord_weights"]
+
+    chords = [
+        chord.replace("♭", "b").replace("♯", "#")
+        for row in chord_weights
+        for chord in row
+    ]
+    degree_weights = np.array(
+        [weight for row in chord_weights for weight in row.values()]
+    )
+
+    # One song per chord, so the weights can be applied per chord
+    per_chord = EncodedCorpus.from_token_lists([chord] for chord in chords)
+    profiles = pitch_class_profiles(per_chord, profile=profile)
+
+    templates = (profiles * degree_weights[:, None]).reshape(len(modes), 7, 12)
+    templates = templates.sum(axis=1)
+    templates.flags.writeable = False
+    return templates
+
+
+def find_keys(
+    songs: Union[pd.Series, EncodedCorpus],
+    modes=("ionian", "aeolian"),
+    chord_type="triads",
+    weights=None,
+    profile="pitch_class",
+) -> KeyPredictions:
+    """
+    Transposition-invariant alternative to `predict_keys`.
+
+    Every song is reduced to its normalized 12-bin profile (see `pitch_class_profiles`), and
+    correlated with the template of every mode at all 12 rotations at once: the circular
+    cross-correlation is a product in the Fourier domain, one rFFT per song and mode.
+    Scores are the correlation of the best key and mode, ties go to the first mode and key.
+    """
+    from chordal_wip.scales import Scale
+
+    profiles = pitch_class_profiles(songs, profile=profile)
+    templates = mode_templates(
+        tuple(modes),
+        chord_type,
+        None if weights is None else tuple(weights),
+        profile=profile,
+    )
+
+    totals = profiles.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        profiles = profiles / totals
+
+    # correlation[s, m, k] = sum_i templates[m, i] * profiles[s, (i + k) % 12]
+    spectrum = np.fft.rfft(profiles, axis=1)[:, None, :] * np.conj(
+        np.fft.rfft(templates, axis=1)
+    )
+    correlation = np.fft.irfft(spectrum, n=12, axis=2)
+
+    # Drop the FFT round-off, so equal correlations stay ties
+    correlation = np.round(correlation, 9).reshape(len(profiles), -1)
+
+    best = np.argmax(np.nan_to_num(correlation, nan=-np.inf), axis=1)
+    scores = correlation[np.arange(len(profiles)), best]
+    modes = np.asarray(modes, dtype=str)
+    keys = Scale.ALL_NOTES[best % 12]
+    modes = modes[best // 12]
+
+    empty = totals[:, 0] == 0
+    keys[empty] = ""
+    modes[empty] = ""
+
+    return KeyPredictions(keys, modes, scores)
+
+
 # TODO: Main issue is that it is not yet clear what kind of chord format should be used here.
 # progression = "Dm Dm A7 G7 Dm Dm A7 G7 Bm A G A Dm Dm A7 G7 Bm A G A Dm Dm A7 G7 Bm A G A Dm"
 #
@@ -0,0 +1,201 @@
+import re
+from typing import Iterable, Optional
+import numpy as np
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordparts import ChordParts
+from chordal_wip.scales import Chord, Scale
+
+# Pitch class of every root spelling: the sharps of `Scale.ALL_NOTES` plus flats and the
+# enharmonic naturals (E#, Fb, B#, Cb)
+NOTE_INDEX = {note: i for i, note in enumerate(Scale.ALL_NOTES)}
+for _natural in "ABCDEFG":
+    NOTE_INDEX.setdefault(f"{_natural}#", (NOTE_INDEX[_natural] + 1) % 12)
+    NOTE_INDEX.setdefault(f"{_natural}b", (NOTE_INDEX[_natural] - 1) % 12)
+
+ROOT_REGEX = re.compile(r"[A-G][#b]?")
+
+DEGREE_REGEX = re.compile(r"([#b+-]?)(\d+)([#b+-]?)")
+
+# Quality (or sus) of a canonical chord -> base triad in `Chord.CHORD_FORMULAS`
+BASE_TRIADS = {
+    "maj": "maj",
+    "m": "min",
+    "dim": "dim",
+    "sus2": "sus2",
+    "sus4": "sus4",
+}
+
+FULL_MASK = 0xFFF
+
+
+class PitchClassTable:
+    """
+    Canonical chord -> (root index, bass index, 12-bit pitch-class mask).
+
+    Indices follow `Scale.ALL_NOTES` (C = 0) and bit i of the mask is set if pitch class i
+    sounds in the chord, so "C#m" and "Dbm" encode identically and transposing is a rotation.
+    The table is precomputed for every root spelling and every chord of `Chord.CHORD_FORMULAS`,
+    other chords are encoded on first lookup and kept.
+    """
+
+    def __init__(self, canonizer: Optional[ChordCanonizer] = None):
+        self._canonizer = (
+            canonizer if canonizer is not None else ChordCanonizer()
+        )
+        self._table = {}
+        self._precompute()
+
+    # Public Methods ----
+    def lookup(self, chord: str) -> Optional[tuple]:
+        """(root, bass, mask) of a canonical chord, None if it has no pitch-class encoding"""
+        try:
+            return self._table[chord]
+        except KeyError:
+            encoded = self._table[chord] = self._encode(chord)
+            return encoded
+
+    def encode(self, chords: Iterable[str]) -> np.ndarray:
+        """
+        Encode canonical chords into an (n, 3) int16 array of root, bass and mask columns.
+        Chords without encoding (e.g. "X") are rows of -1.
+        """
+        rows = [self.lookup(chord) or (-1, -1, -1) for chord in chords]
+        return np.array(rows, dtype=np.int16).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self._table)
+
+    # Private Methods ----
+    def _precompute(self):
+        for root in NOTE_INDEX:
+            for suffix in Chord.CHORD_FORMULAS:
+                suffix = suffix.replace("♭", "b").replace("♯", "#")
+                self.lookup(self._canonizer._canonicalize_chord(root + suffix))
+
+    def _encode(self, chord: str) -> Optional[tuple]:
+        try:
+            parts = ChordParts.from_canonical(chord)
+        except ValueError:
+            # Not in canonical notation (e.g. the edge case "Em13"), parse it from scratch
+            canonizer = self._canonizer
+            parts = canonizer._normalize(canonizer._decompose(chord))
+
+        return encode_parts(parts)
+
+
+# Encoding ----
+def encode_parts(parts: ChordParts) -> Optional[tuple]:
+    """
+    (root, bass, mask) of decomposed chord parts.
+    Chords without root or with unclear modifiers have no encoding and give None.
+    """
+    if parts.root is None or parts.unclear:
+        return None
+
+    intervals = chord_intervals(parts)
+    if intervals is None:
+        return None
+
+    root = NOTE_INDEX[parts.root]
+    bass = root
+
+    if parts.slash:
+        bass = NOTE_INDEX[ROOT_REGEX.match(parts.slash).group(0)]
+
+    mask = 0
+    for interval in intervals:
+        mask |= 1 << ((root + interval) % 12)
+
+    return root, bass, mask
+
+
+def chord_intervals(parts: ChordParts) -> Optional[set]:
+    """
+    Semitones above the root sounding in a chord, built from `Chord.CHORD_FORMULAS` and
+    `Chord.DEGREE_INTERVALS`. Extensions beyond the 7th imply the 7th (and 11ths/13ths the 9th)
+    unless a 6th is present, adds never do.
+    """
+    quality = parts.quality
+    extensions = parts.extensions
+    plain = set(extensions)
+
+    # Base triad, the sus of "Csus4" or the odd quality of "C4"
+    if parts.sus:
+        base = parts.sus
+    elif quality in BASE_TRIADS:
+        base = BASE_TRIADS[quality]
+    elif extensions == ("5",) and not parts.adds:
+        base = "5"
+    else:
+        base = "maj"
+
+    intervals = set(Chord.CHORD_FORMULAS[base])
+
+    # Implied 7th and 9th
+    if "7" in plain or (plain & {"9", "11", "13"} and "6" not in plain):
+        intervals.add({"maj": 11, "dim": 9}.get(quality, 10))
+
+    if plain & {"11", "13"}:
+        intervals.add(Chord.DEGREE_INTERVALS["9"])
+
+    for ext in extensions:
+        if ext in ("5", "7"):
+            continue
+        if not _add_degree(intervals, ext):
+            return None
+
+    for add in parts.adds:
+        if not _add_degree(intervals, add.removeprefix("add")):
+            return None
+
+    for alteration in parts.alterations:
+        if not _add_degree(intervals, alteration):
+            return None
+
+    return intervals
+
+
+def _add_degree(intervals: set, degree: str) -> bool:
+    """Add a degree like "9", "b9" or "9#" to `intervals`, an altered 5th replaces the 5th"""
+    match = DEGREE_REGEX.fullmatch(degree)
+
+    if not match or match.group(2) not in Chord.DEGREE_INTERVALS:
+        return False
+
+    leading, number, trailing = match.groups()
+    accidental = leading or trailing
+    shift = 1 if accidental in ("#", "+") else -1 if accidental else 0
+
+    if number == "5" and shift:
+        intervals.discard(Chord.DEGREE_INTERVALS["5"])
+
+    intervals.add(Chord.DEGREE_INTERVALS[number] + shift)
+    return True
+
+
+# Bit operations ----
+def transpose(mask, semitones: int):
+    """Transpose 12-bit masks (int or NumPy array) up by `semitones`, a rotation of the bits"""
+    k = semitones % 12
+    return ((mask << k) | (mask >> (12 - k))) & FULL_MASK
+
+
+def mask_notes(mask: int) -> list:
+    """Note names of a mask, in `Scale.ALL_NOTES` order"""
+    return [note for i, note in enumerate(Scale.ALL_NOTES) if mask >> i & 1]
+
+
+# Lazy init ----
+_pitch_class_table = None
+
+
+def get_pitch_class_table() -> PitchClassTable:
+    """
+    Return the shared pitch-class table. If it hasn't been built yet, build it first.
+    """
+    global _pitch_class_table
+
+    if _pitch_class_table is None:
+        _pitch_class_table = PitchClassTable()
+
+    return _pitch_class_table
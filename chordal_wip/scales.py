@@ -1,4 +1,5 @@
-from typing import ValuesView
+from types import MappingProxyType
+from typing import NamedTuple, ValuesView
 import pandas as pd
 import numpy as np
 import random
@@ -74,7 +75,43 @@ class Chord:
         "maj7": [0, 4, 7, 11],  # Root, major 3rd, perfect 5th, major 7th
         "min7": [0, 3, 7, 10],  # Root, minor 3rd, perfect 5th, minor 7th
         "7": [0, 4, 7, 10],  # Root, major 3rd, perfect 5th, minor 7th
-        # Add more chord types as needed
+        # Triads
+        "dim": [0, 3, 6],  # Root, minor 3rd, diminished 5th
+        "aug": [0, 4, 8],  # Root, major 3rd, augmented 5th
+        "sus2": [0, 2, 7],  # Root, major 2nd, perfect 5th
+        "sus4": [0, 5, 7],  # Root, perfect 4th, perfect 5th
+        "5": [0, 7],  # Power chord: Root, perfect 5th
+        # Sixths and sevenths
+        "6": [0, 4, 7, 9],  # Major triad, major 6th
+        "min6": [0, 3, 7, 9],  # Minor triad, major 6th
+        "dim7": [0, 3, 6, 9],  # Diminished triad, diminished 7th
+        "min7♭5": [0, 3, 6, 10],  # Diminished triad, minor 7th
+        "7sus4": [0, 5, 7, 10],  # Suspended 4th, minor 7th
+        # Extensions (stacked on the 7th)
+        "9": [0, 4, 7, 10, 14],
+        "maj9": [0, 4, 7, 11, 14],
+        "min9": [0, 3, 7, 10, 14],
+        "11": [0, 4, 7, 10, 14, 17],
+        "13": [0, 4, 7, 10, 14, 21],
+        "add9": [0, 4, 7, 14],  # No 7th
+        # Alterations
+        "7♭5": [0, 4, 6, 10],
+        "7♯5": [0, 4, 8, 10],
+        "7♭9": [0, 4, 7, 10, 13],
+        "7♯9": [0, 4, 7, 10, 15],
+    }
+
+    # Semitones above the root of a chord degree, e.g. "9" or "add9"
+    # Accidentals ("♭9", "#11") shift them by a half-step. The 7th is the minor 7th (dominant).
+    DEGREE_INTERVALS = {
+        "2": 2,
+        "4": 5,
+        "5": 7,
+        "6": 9,
+        "7": 10,
+        "9": 14,
+        "11": 17,
+        "13": 21,
     }
 
     # We need ionian triads and 7th chord to generate all chords for the modes using rotations
@@ -343,17 +380,81 @@ class MarkovChordProgression(Chord):
         return out
 
 
-# Lazy init ----
-_ref_scales = None
+class RefScales(NamedTuple):
+    """
+    Compiled, read-only form of a reference scales frame (see `get_ref_scales`):
+        - weights: float32 (scales x chords) matrix, 0 where a chord is not in a scale
+        - chord_index: Chord -> column of `weights`
+        - keys, modes: Key and mode of every row of `weights`
+    """
+
+    weights: np.ndarray
+    chord_index: MappingProxyType
+    keys: np.ndarray
+    modes: np.ndarray
+
+    def score(
+        self, columns: np.ndarray, proportions: np.ndarray
+    ) -> np.ndarray:
+        """Score of every scale for chord counts (or proportions) given on the columns of `weights`"""
+        return self.weights[:, columns] @ proportions
+
+
+def compile_ref_scales(reference: pd.DataFrame) -> RefScales:
+    """Dense weight matrix of a reference scales frame, chords in order of first appearance"""
+    chord_index = {}
+    for chord_weights in reference["chord_weights"]:
+        for chord in chord_weights:
+            chord_index.setdefault(chord, len(chord_index))
 
+    weights = np.zeros((len(reference), len(chord_index)), dtype=np.float32)
+    for i, chord_weights in enumerate(reference["chord_weights"]):
+        for chord, weight in chord_weights.items():
+            weights[i, chord_index[chord]] = weight
+
+    keys = reference["key"].to_numpy(dtype=str)
+    modes = reference["mode"].to_numpy(dtype=str)
+    for array in (weights, keys, modes):
+        array.flags.writeable = False
+
+    return RefScales(weights, MappingProxyType(chord_index), keys, modes)
+
+
+# Reference scales ----
+MODES = tuple(Scale.SCALES_DICT)
+CHORD_TYPES = ("triads", "7ths")
 
 # TODO: decide how to handle weights
-def generate_ref_scales():
-    modes = ["ionian", "aeolian"]
+# Current rationale: Favor tonic to avoid introducing genre-specific bias
+DEGREE_WEIGHTS = (2, 1, 1, 1, 1, 1, 1)
+
+
+def generate_ref_scales(
+    modes=("ionian", "aeolian"), chord_type="triads", weights=DEGREE_WEIGHTS
+) -> pd.DataFrame:
+    """
+    One row per mode and key with the weight of every diatonic chord.
+
+    Args:
+        modes: Modes of `Scale.SCALES_DICT`
+        chord_type: "triads" or "7ths", see `Chord.MODE_CHORDS`
+        weights: Weight of the chords on the 7 degrees of the mode, tonic first
+    """
+    for mode in modes:
+        if mode not in Scale.SCALES_DICT:
+            raise ValueError(
+                f"Invalid mode: {mode}. Must be one of {list(MODES)}."
+            )
+    if chord_type not in CHORD_TYPES:
+        raise ValueError(
+            f"Invalid chord type: {chord_type}. Must be one of {list(CHORD_TYPES)}."
+        )
+    if len(weights) != 7:
+        raise ValueError(
+            f"Invalid weights: {weights}. Must be one weight per degree (7)."
+        )
+
     keys = Scale.ALL_NOTES
-    chord_type = "triads"
-    # Current rationale: Favor tonic to avoid introducing genre-specific bias
-    weights = [2, 1, 1, 1, 1, 1, 1]
 
     ref_scales_list = []
 
@@ -374,13 +475,45 @@ def generate_ref_scales():
     return pd.DataFrame(ref_scales_list)
 
 
-def get_ref_scales():
+# Lazy init ----
+_ref_scales = {}
+_compiled_ref_scales = {}
+
+
+def get_ref_scales(
+    modes=("ionian", "aeolian"), chord_type="triads", weights=DEGREE_WEIGHTS
+) -> pd.DataFrame:
     """
-    Return the cached scales dictionary. If it hasn't been generated yet, generate it first.
+    Return the cached reference scales of a configuration (see `generate_ref_scales`).
+    If it hasn't been generated yet, generate it first. The frame must not be modified.
     """
-    global _ref_scales
+    config = (tuple(modes), chord_type, tuple(weights))
+
+    if config not in _ref_scales:
+        _ref_scales[config] = generate_ref_scales(*config)
+
+    return _ref_scales[config]
+
+
+def get_compiled_ref_scales(
+    reference: pd.DataFrame = None, **config
+) -> RefScales:
+    """
+    Return the compiled reference scales of a configuration, cached like `get_ref_scales`.
+    A `reference` frame is served from the cache if it is the frame of a configuration,
+    any other frame is compiled on every call.
+    """
+    if reference is None:
+        reference = get_ref_scales(**config)
+
+    key = next(
+        (key for key, frame in _ref_scales.items() if frame is reference),
+        None,
+    )
+    if key is None:
+        return compile_ref_scales(reference)
 
-    if _ref_scales is None:
-        _ref_scales = generate_ref_scales()
+    if key not in _compiled_ref_scales:
+        _compiled_ref_scales[key] = compile_ref_scales(reference)
 
-    return _ref_scales
+    return _compiled_ref_scales[key]
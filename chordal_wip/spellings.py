@@ -0,0 +1,157 @@
+import gzip
+import json
+import os
+import tempfile
+import zlib
+from itertools import product
+from pathlib import Path
+from chordal_wip.cachestore import fingerprint
+
+# Shipped table of `ChordCanonizer`, rebuilt with `python -m chordal_wip build-spellings`
+SPELLING_TABLE_PATH = (
+    Path(__file__).parent / "data" / "canonical_spellings.json.gz"
+)
+
+# Tables rebuilt at runtime (other rules than the shipped table), one file per fingerprint
+SPELLING_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "chordal_wip"
+)
+
+# Unreadable tables: missing or half-written files (BadGzipFile is an OSError,
+# JSONDecodeError a ValueError) and payloads of an unexpected shape
+READ_ERRORS = (OSError, EOFError, zlib.error, ValueError, KeyError, TypeError)
+
+# Building blocks of the enumerated chord suffixes: quality, extension, add, sus
+# The qualities are the spellings of `ChordCanonizer.ALLOWED_QUALITIES` plus no quality.
+EXTENSIONS = (
+    "",
+    "2",
+    "4",
+    "5",
+    "6",
+    "7",
+    "9",
+    "11",
+    "13",
+    "69",
+    "7b5",
+    "7#5",
+    "7b9",
+    "7#9",
+    "7#11",
+    "7b13",
+    "9#11",
+    "13b9",
+    "7+",
+    "5+",
+)
+ADDS = ("", "add2", "add4", "add9", "add11", "add13")
+SUS = ("", "sus2", "sus4")
+
+
+def enumerate_suffixes(canonizer) -> list:
+    """Plausible spellings of everything following the root, e.g. "m7", "maj7add9", "7sus4" """
+    qualities = ("", *canonizer.ALLOWED_QUALITIES)
+    suffixes = dict.fromkeys(
+        "".join(parts) for parts in product(qualities, EXTENSIONS, ADDS, SUS)
+    )
+    return list(suffixes)
+
+
+def build_spelling_table(canonizer) -> dict:
+    """
+    Canonicalize every enumerated suffix once. The canonical form of a chord without slash or
+    brackets is its root followed by the canonical tail of its suffix, so one root is enough.
+    """
+    table = {}
+
+    for suffix in enumerate_suffixes(canonizer):
+        parts = canonizer._normalize(canonizer._decompose("C" + suffix))
+        table[suffix] = canonizer._reconstruct(parts)[1:]
+
+    return table
+
+
+def table_fingerprint(canonizer) -> str:
+    """Changes with the canonizer rules (e.g. `ALLOWED_QUALITIES`, `EDGE_CASES`) and the enumeration"""
+    return fingerprint(canonizer._fingerprint(), EXTENSIONS, ADDS, SUS)
+
+
+def save_spelling_table(table: dict, path, fingerprint: str):
+    """
+    Write a table atomically: readers in other processes see the previous file or the
+    complete new one, never a half-written one.
+    """
+    path = Path(path)
+    payload = {"fingerprint": fingerprint, "spellings": table}
+
+    data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=path.name, suffix=".tmp"
+    )
+    try:
+        # No name or timestamp in the header, so rebuilding an unchanged table changes no byte
+        with open(fd, "wb") as f:
+            with gzip.GzipFile(
+                filename="", mode="wb", fileobj=f, mtime=0
+            ) as gz:
+                gz.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_spelling_table(canonizer) -> dict:
+    """
+    Suffix -> canonical tail table of a canonizer, loaded once per process and rules.
+    `SPELLING_TABLE_PATH` is only read. A missing, unreadable or stale table (rules changed
+    since it was built) is rebuilt and cached in `SPELLING_CACHE_DIR`, the package is never
+    written to.
+    """
+    path = canonizer.SPELLING_TABLE_PATH
+    expected = table_fingerprint(canonizer)
+    key = (str(path), expected)
+
+    if key in _tables:
+        return _tables[key]
+
+    cache_path = SPELLING_CACHE_DIR / f"spellings-{expected[:16]}.json.gz"
+    table = None
+
+    for candidate in (path, cache_path):
+        if candidate is not None:
+            table = read_spelling_table(candidate, expected)
+        if table is not None:
+            break
+
+    if table is None:
+        table = build_spelling_table(canonizer)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            save_spelling_table(table, cache_path, expected)
+        except OSError:
+            # No writable cache directory, the table is only kept in memory
+            pass
+
+    _tables[key] = table
+    return table
+
+
+def read_spelling_table(path, fingerprint: str):
+    """Spellings of a table file, None if it is unreadable or built for another fingerprint"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload["fingerprint"] == fingerprint:
+            return payload["spellings"]
+    except READ_ERRORS:
+        pass
+
+    return None
+
+
+# Lazy init ----
+_tables = {}
@@ -0,0 +1,180 @@
+import math
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Iterator, Optional
+import pandas as pd
+from chordal_wip.chordisolator import ChordIsolator
+from chordal_wip.helpers import import_pyarrow
+
+FORMATS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".parquet": "parquet",
+}
+
+
+def file_format(path) -> str:
+    suffix = Path(path).suffix.lower()
+
+    if suffix not in FORMATS:
+        raise ValueError(
+            f"Unsupported file type: {suffix}. Must be one of {list(FORMATS)}."
+        )
+
+    return FORMATS[suffix]
+
+
+# Readers ----
+def read_chunks(path, chunksize=10_000) -> Iterator[pd.DataFrame]:
+    """Yield the rows of a local JSONL, CSV or Parquet file as DataFrames of `chunksize` rows"""
+    fmt = file_format(path)
+
+    if fmt == "parquet":
+        _, parquet = import_pyarrow()
+        for batch in parquet.ParquetFile(path).iter_batches(
+            batch_size=chunksize
+        ):
+            yield batch.to_pandas()
+        return
+
+    if fmt == "jsonl":
+        reader = pd.read_json(path, lines=True, chunksize=chunksize)
+    else:
+        reader = pd.read_csv(path, chunksize=chunksize)
+
+    with reader:
+        yield from reader
+
+
+# Writers ----
+class ChunkWriter:
+    """Append DataFrames chunk by chunk to a JSONL, CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fmt = file_format(path)
+        self.n_rows = 0
+        self._file = None
+        self._parquet_writer = None
+
+    def write(self, df: pd.DataFrame):
+        if self.fmt == "parquet":
+            self._write_parquet(df)
+        elif self.fmt == "jsonl":
+            if self._file is None:
+                self._file = open(self.path, "w", encoding="utf-8")
+            df.to_json(
+                self._file, orient="records", lines=True, force_ascii=False
+            )
+        else:
+            df.to_csv(
+                self.path,
+                mode="a" if self.n_rows else "w",
+                header=not self.n_rows,
+                index=False,
+            )
+
+        self.n_rows += len(df)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+    def _write_parquet(self, df: pd.DataFrame):
+        pa, parquet = import_pyarrow()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        if self._parquet_writer is None:
+            self._parquet_writer = parquet.ParquetWriter(
+                self.path, _parquet_schema(pa, table)
+            )
+
+        # Later chunks may infer other types, e.g. int64 where the first chunk had NaN (double)
+        self._parquet_writer.write_table(
+            table.cast(self._parquet_writer.schema)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parquet_schema(pa, table):
+    """
+    Schema of a Parquet file, fixed by its first chunk. Columns the first chunk only has nulls
+    for have no type to infer, they are written as strings.
+    """
+    fields = [
+        pa.field(field.name, pa.large_string())
+        if column.null_count == len(column)
+        else field
+        for field, column in zip(table.schema, table.columns)
+    ]
+
+    if fields == list(table.schema):
+        return table.schema
+
+    # The pandas metadata would restore the dtypes of the first chunk
+    return pa.schema(fields)
+
+
+# Pipeline ----
+def isolate_file(
+    input_path,
+    output_path,
+    column="chords_str",
+    output_column="chords_str_clean",
+    chunksize=10_000,
+    isolator: Optional[ChordIsolator] = None,
+    workers=None,
+    cache_path=None,
+) -> int:
+    """
+    Stream a file through `ChordIsolator` and write the results incrementally, so peak memory
+    is bounded by `chunksize` rather than by the size of the input.
+
+    Args:
+        input_path: JSONL, CSV or Parquet file with the raw song texts
+        output_path: JSONL, CSV or Parquet file, input columns plus `output_column`
+        column: Column with the raw song texts, missing values are treated as empty texts
+        chunksize: Number of rows held in memory at once
+        isolator: Configured isolator, default `ChordIsolator()`
+        workers: If set, every chunk is sharded across that many processes
+        cache_path: Verdict cache file, loaded before the run and checkpointed after every chunk
+
+    Returns:
+        Number of rows written
+    """
+    isolator = isolator if isolator is not None else ChordIsolator()
+
+    if cache_path is not None and Path(cache_path).exists():
+        isolator.load_cache(cache_path)
+
+    # One pool for the whole file, its workers keep their verdict caches between chunks
+    pool = isolator.process_pool(workers) if workers else nullcontext()
+
+    with pool, ChunkWriter(output_path) as writer:
+        for df in read_chunks(input_path, chunksize=chunksize):
+            texts = df[column].fillna("").astype(str)
+
+            if workers:
+                # One task per worker, so every chunk is spread over the whole pool
+                df[output_column] = isolator.isolate_parallel(
+                    texts,
+                    chunksize=max(1, math.ceil(len(texts) / workers)),
+                    pool=pool,
+                )
+            else:
+                df[output_column] = isolator.isolate_series(texts)
+
+            writer.write(df)
+
+            if cache_path is not None:
+                isolator.save_cache(cache_path, append=True)
+
+    return writer.n_rows
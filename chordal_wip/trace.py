@@ -0,0 +1,64 @@
+import json
+from typing import Callable, Union
+
+
+class Tracer:
+    """
+    Structured debug trace, e.g. of the chord parses of `ChordCanonizer`.
+
+    Tracing is off unless a `Tracer` is passed to a component, which then only checks
+    `tracer is not None` on its hot path. Events are dicts with an "event" name plus fields,
+    written as JSON lines to a file or handed to a callback.
+
+    Usage:
+        with Tracer("trace.jsonl", sample=100) as tracer:
+            ChordCanonizer(tracer=tracer).canonicalize_series(songs)
+    """
+
+    def __init__(self, sink: Union[str, Callable[[dict], None]], sample=1):
+        """
+        Args:
+            sink: Path of a JSONL file (overwritten) or a callable receiving every event
+            sample: Trace one in `sample` units of work (chords, predictions)
+        """
+        if sample < 1:
+            raise ValueError(f"Invalid sample: {sample}. Must be at least 1.")
+
+        self.sample = sample
+        self.active = False
+        self.n_events = 0
+        self._n_begun = 0
+
+        if callable(sink):
+            self._file = None
+            self._sink = sink
+        else:
+            self._file = open(sink, "w", encoding="utf-8")
+            self._sink = self._write
+
+    # Public Methods ----
+    def begin(self) -> bool:
+        """Start a unit of work, returns whether it is sampled (also kept in `active`)"""
+        self.active = self._n_begun % self.sample == 0
+        self._n_begun += 1
+        return self.active
+
+    def emit(self, event: str, **fields):
+        """Send an event, callers only emit while `active`"""
+        self.n_events += 1
+        self._sink({"event": event, **fields})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Private Methods ----
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, default=str) + "\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
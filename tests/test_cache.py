@@ -0,0 +1,85 @@
+from chordal_wip.cache import VerdictCache, LRUCache, SLRUCache
+from chordal_wip.chordisolator import ChordIsolator
+import pytest
+
+
+def test_verdict_cache_stats():
+    cache = VerdictCache()
+    cache["Am"] = True
+    cache["lyrics"] = False
+
+    cache.get("Am")
+    cache.get("lyrics")
+    cache.get("G")
+
+    actual = cache.stats()
+    expected = {
+        "policy": "VerdictCache",
+        "hits": 2,
+        "misses": 1,
+        "evictions": 0,
+        "size": 2,
+    }
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache["Am"] = True
+    cache["G"] = True
+    cache.get("Am")
+    cache["lyrics"] = False
+
+    actual = sorted(cache)
+    expected = ["Am", "lyrics"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_byte_budget():
+    cache = LRUCache(max_bytes=500)
+
+    for i in range(100):
+        cache[f"junk{i}"] = False
+
+    assert 0 < len(cache) < 100
+    assert cache.stats()["bytes"] <= 500
+
+
+def test_slru_keeps_frequent_tokens():
+    cache = SLRUCache(max_entries=10)
+
+    for chord in ["G", "Am"]:
+        cache[chord] = True
+        cache.get(chord)
+
+    # Flood with one-off junk
+    for i in range(1000):
+        cache[f"junk{i}"] = False
+
+    assert "G" in cache and "Am" in cache
+    assert len(cache) <= 10
+
+
+def test_bounded_cache_requires_budget():
+    with pytest.raises(ValueError):
+        LRUCache()
+
+
+def test_isolator_cache_stats():
+    iso = ChordIsolator(cache=LRUCache(max_entries=2), accept_table=[])
+    iso.raw_chord_isolation("Am G Am Cbb Am")
+
+    actual = iso.cache_stats()
+    expected = {
+        "policy": "LRUCache",
+        "hits": 2,
+        "misses": 3,
+        "evictions": 1,
+        "size": 2,
+        "bytes": actual["bytes"],
+    }
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
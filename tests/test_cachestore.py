@@ -0,0 +1,73 @@
+import re
+from chordal_wip.cachestore import CacheStore
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordisolator import ChordIsolator
+
+
+def test_isolator_cache_roundtrip(tmp_path):
+    path = tmp_path / "cache.sqlite"
+
+    iso = ChordIsolator(accept_table=[])
+    iso.raw_chord_isolation("Am G Cbb Cmaj7")
+    iso.save_cache(path)
+
+    warm = ChordIsolator(accept_table=[])
+    n_loaded = warm.load_cache(path)
+
+    actual = dict(warm._cached_tokens.items())
+    expected = {"Am": True, "G": True, "Cbb": False, "Cmaj7": True}
+
+    assert n_loaded == 4
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_isolator_cache_fingerprint_invalidation(tmp_path):
+    path = tmp_path / "cache.sqlite"
+
+    iso = ChordIsolator(accept_table=[])
+    iso.raw_chord_isolation("Am G")
+    iso.save_cache(path)
+
+    class TriadIsolator(ChordIsolator):
+        def _init_chord_regex(self):
+            return re.compile(r"^[A-G][#b]?m?$")
+
+    actual = TriadIsolator().load_cache(path)
+    expected = 0
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_isolator_cache_append(tmp_path):
+    path = tmp_path / "cache.sqlite"
+
+    iso = ChordIsolator(accept_table=[])
+    iso.raw_chord_isolation("Am G")
+    iso.save_cache(path)
+    iso.raw_chord_isolation("Am Cbb")
+
+    # Only the verdict added since the last save is pending
+    assert iso._cached_tokens._changes == {"Cbb": False}
+
+    iso.save_cache(path, append=True)
+
+    actual = dict(CacheStore(path).load("isolator", iso._fingerprint()))
+    expected = {"Am": 1, "G": 1, "Cbb": 0}
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_canonizer_cache_roundtrip(tmp_path):
+    path = tmp_path / "cache.sqlite"
+
+    cc = ChordCanonizer()
+    cc.canonicalize("Am lyrics")
+    cc.save_cache(path)
+
+    warm = ChordCanonizer()
+    warm.load_cache(path)
+
+    actual = dict(warm._cached_chords.items())
+    expected = {"Am": "A(q:m)", "lyrics": False}
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
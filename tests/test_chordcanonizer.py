@@ -1,4 +1,7 @@
+from chordal_wip.cache import LRUCache
 from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordparts import ChordParts
+import pandas as pd
 import pytest
 
 cc = ChordCanonizer()
@@ -8,20 +11,23 @@ def test_decompose_1():
     test = "Ebmaj7add9/G"
 
     actual = cc._decompose(test)
-    expected = {
-        "root": "Eb",
-        "quality": "maj",
-        "adds": ["add9"],
-        "sus": None,
-        "dominant": None,
-        "extensions": ["7"],
-        "alterations": [],
-        "slash": "G",
-        "unclear": [],
-    }
+    expected = ChordParts(
+        root="Eb",
+        quality="maj",
+        adds=("add9",),
+        extensions=("7",),
+        slash="G",
+    )
     assert actual == expected, f"Expected {expected}, got {actual}"
 
 
+def test_chord_parts_hashable():
+    actual = {cc._decompose("Ebmaj7add9/G"), cc._decompose("Ebmaj7add9/G")}
+    expected = 1
+
+    assert len(actual) == expected, f"Expected {expected}, got {len(actual)}"
+
+
 def test_edge_cases_1():
     test = "E13-"
 
@@ -148,3 +154,97 @@ def test_canonicalize_extensions_edge_cases():
     expected = " ".join(expected_list)
 
     assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_canonicalize_memo():
+    memo = ChordCanonizer(cache=LRUCache(max_entries=10))
+    test = "Ebmaj7add9/G lyrics Ebmaj7add9/G lyrics"
+
+    actual = memo.canonicalize(test)
+    expected = "Eb(q:maj)(m:add9)(e:7)/G X Eb(q:maj)(m:add9)(e:7)/G X"
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    # Keyed by the raw chord, failures are memoized too
+    actual = dict(memo._cached_chords.items())
+    expected = {"Ebmaj7add9/G": "Eb(q:maj)(m:add9)(e:7)/G", "lyrics": False}
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert memo.cache_stats()["hits"] == 2
+    assert memo.cache_stats()["misses"] == 2
+
+
+def test_canonicalize_series():
+    test = pd.Series(
+        ["Am G Am", "", "Ebmaj7add9/G  Am", "E13- Csus"],
+        index=[3, 1, 4, 1],
+        name="chords",
+    )
+
+    memo = ChordCanonizer()
+    actual = memo.canonicalize_series(test)
+    expected = test.apply(cc.canonicalize)
+
+    assert actual.tolist() == expected.tolist()
+    assert actual.index.equals(test.index) and actual.name == test.name
+
+    # Every distinct chord is canonicalized once
+    actual = memo.cache_stats()["misses"]
+    expected = 6
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_scan_modifiers():
+    test = "min7b5add13#xsus"
+
+    actual = cc._scan_modifiers(test)
+    expected = (
+        ("m", "literal", None),
+        ("7", "degree", 7),
+        ("b5", "degree", 5),
+        ("add13#", "add", 13),
+        ("sus", "literal", None),
+    )
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_scan_slash_modifiers():
+    # A slash candidate is a single scanned modifier, anything else is unclear
+    test = "Cm7/b5 C/min C/9xyz C/sus3"
+
+    actual = cc.canonicalize(test)
+    expected = "C(q:m)(e:b5,7) C(q:m) C(u:9xyz) C(u:sus3)"
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_modifier_table_bounded():
+    class SmallCanonizer(ChordCanonizer):
+        MODIFIER_TABLE_SIZE = 2
+
+    small = SmallCanonizer()
+    for chord in ["Cm7", "Cmaj9", "C7sus4", "Cadd9", "Cdim"]:
+        small._decompose(chord)
+
+    actual = len(small._modifier_table)
+    expected = 2
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_canonicalize_many():
+    test = ["Am", "lyrics", "Ebmaj7add9/G", "Am", "E13-", "Cmaj7(b9)"]
+
+    memo = ChordCanonizer()
+    memo.canonicalize("Am")
+
+    actual = memo.canonicalize_many(test, workers=2, chunksize=2)
+    expected = [cc.canonicalize(chord) for chord in test]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    # Worker memo entries are merged back into the parent
+    assert memo._cached_chords["lyrics"] is False
+    assert memo._cached_chords["E13-"] == "Em13"
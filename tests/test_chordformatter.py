@@ -0,0 +1,103 @@
+from chordal_wip.cache import LRUCache
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordformatter import ChordFormatter
+from chordal_wip.encoded import EncodedCorpus
+import pandas as pd
+
+cc = ChordCanonizer()
+cf = ChordFormatter()
+
+
+def test_format():
+    test = [
+        "Eb(q:maj)(m:add9)(e:7)/G",
+        "C(q:maj)",
+        "C(q:m)(e:b5,7)",
+        "C(d:True)(e:7,b9)",
+        "C(d:True)(e:7)(a:#5)",
+        "C(q:m)(e:7)(a:#5)",
+        "C(q:m)(m:add13)(e:7,#11)",
+        "C(s:sus4)(e:7)",
+        "Em13",
+        "X",
+    ]
+
+    actual = [cf.format(chord) for chord in test]
+    expected = [
+        "Ebmaj7add9/G",
+        "C",
+        "Cm7(b5)",
+        "C7(b9)",
+        "Caug7",
+        "Cm7(5+)",
+        "Cm7(#11)add13",
+        "C7sus4",
+        "Em13",
+        "X",
+    ]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_format_roundtrip():
+    chords = ["Ebmaj7add9/G", "C#m7b5", "Bb7#9", "F+7", "Gsus2", "Adim7/C"]
+
+    for chord in chords:
+        canonical = cc._canonicalize_chord(chord)
+
+        actual = cc._canonicalize_chord(cf.format(canonical))
+        expected = canonical
+
+        assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_format_slash_modifier():
+    # An accidental right after the root would change the root ("A(b5)" -> "Ab5")
+    test = ["A(e:b5)", "A(m:add9)(e:b5)", "A(e:#11)", "F(s:sus2)(e:#9)"]
+
+    actual = [cf.format(chord) for chord in test]
+    expected = ["A/b5", "Aadd9/b5", "A/#11", "Fsus2/#9"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    actual = [cc._canonicalize_chord(chord) for chord in actual]
+    expected = test
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_format_memo():
+    formatter = ChordFormatter(cache=LRUCache(max_entries=2))
+    formatter.tidy_up("C(q:maj) A(q:m) C(q:maj)")
+
+    actual = {
+        k: v
+        for k, v in formatter.cache_stats().items()
+        if k in ("hits", "misses")
+    }
+    expected = {"hits": 1, "misses": 2}
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_format_series():
+    series = pd.Series(
+        ["C(q:maj) A(q:m)", "X G(d:True)(e:7)"], index=[3, 5], name="chords"
+    )
+
+    actual = cf.format_series(series)
+    expected = series.apply(cf.tidy_up)
+
+    assert actual.tolist() == expected.tolist(), (
+        f"Expected {expected.tolist()}, got {actual.tolist()}"
+    )
+    assert actual.index.equals(series.index) and actual.name == "chords"
+
+
+def test_format_encoded():
+    corpus = EncodedCorpus.from_strings(["C(q:maj) A(q:m)", "C(q:maj)"])
+
+    actual = cf.format_encoded(corpus).to_strings()
+    expected = ["C Am", "C"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
@@ -1,7 +1,15 @@
-from chordal_wip.chordisolator import ChordIsolator
+from chordal_wip.chordisolator import (
+    ChordIsolator,
+    build_accept_table,
+    load_accept_table,
+    seed_chords,
+)
 from re import sub
+import pandas as pd
+import pytest
 
 cc = ChordIsolator(char_threshold=10)
+fused = ChordIsolator(char_threshold=10, engine="fused")
 
 
 def test_tokenize():
@@ -148,3 +156,177 @@ def test_raw_chord_isolation():
     expected = sub(r"\s+", " ", expected)
 
     assert actual == expected, f"Expected {expected}, got {actual}"
+
+    # The fused engine must be byte-identical
+    actual_fused = fused.raw_chord_isolation(test)
+
+    assert actual_fused == expected, f"Expected {expected}, got {actual_fused}"
+
+
+def test_isolate_series():
+    test = pd.Series(
+        [
+            "Intro: Am,C G^D7 Bridge",
+            "",
+            "   ",
+            "A|-3-2-0---| (Cmaj7 Am Am/G) Verse",
+            "Eb7(9/5-) D#m7(5b) B♭ lyrics without chords",
+        ],
+        index=[3, 1, 4, 1, 5],
+    )
+
+    iso = ChordIsolator(char_threshold=10)
+    actual = iso.isolate_series(test).tolist()
+    expected = test.apply(
+        ChordIsolator(char_threshold=10).raw_chord_isolation
+    ).tolist()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_isolate_series_empty():
+    actual = cc.isolate_series(pd.Series([], dtype=object)).tolist()
+    expected = []
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_fused_engine_edge_cases():
+    test = ",Am,,C^^G%  (Dm7) B♭maj7° C|-3-| A-- x,,E7,, Cadd9/ E13- ,,, F#m,"
+
+    actual = fused.raw_chord_isolation(test)
+    expected = cc.raw_chord_isolation(test)
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError):
+        ChordIsolator(engine="turbo")
+
+
+def test_isolate_parallel():
+    test = pd.Series(
+        ["Am C Bridge", "", "G D7 lyrics", "Em A|-3-| Cmaj9", "Am Cbb Am"]
+    )
+
+    iso = ChordIsolator(char_threshold=10)
+    actual = iso.isolate_parallel(test, workers=2, chunksize=2).tolist()
+    expected = test.apply(cc.raw_chord_isolation).tolist()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    # Worker verdicts are merged back into the parent cache
+    assert iso._cached_tokens["Cmaj9"] is True
+    assert iso._cached_tokens["Cbb"] is False
+
+
+def test_isolate_series_fused():
+    test = pd.Series(["Am C Bridge", "", "G,D7 lyrics"])
+
+    actual = fused.isolate_series(test).tolist()
+    expected = test.apply(cc.raw_chord_isolation).tolist()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_instrumented_stats():
+    iso = ChordIsolator(char_threshold=10, instrument=True)
+    iso.raw_chord_isolation(
+        "lyrics Am Am Bridge A|-3-| Cmaj7add9add11 Cm9add11 Cm9add11 Cbb Cbb"
+    )
+
+    actual = iso.stats()["counts"]
+    expected = {
+        "eroded_empty": 1,
+        "fast_accept": 2,
+        "cache_hit_valid": 1,
+        "cache_hit_junk": 1,
+        "rejected_long": 1,
+        "rejected_tab": 1,
+        "rejected_charset": 1,
+        "validated": 1,
+        "invalid": 1,
+    }
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert set(iso.stats()["seconds"]) == set(ChordIsolator.STAT_STAGES)
+    assert iso.stats()["seconds"]["tokenize"] > 0
+
+
+def test_instrumented_stats_series():
+    test = pd.Series(
+        ["lyrics Am Am Bridge A|-3-| Cm9add11 Cbb", "Cm9add11 Cbb Am"] * 50
+    )
+
+    # Every occurrence is counted, as when isolating row by row
+    batch = ChordIsolator(instrument=True)
+    batch.isolate_series(test)
+    rows = ChordIsolator(instrument=True)
+    test.apply(rows.raw_chord_isolation)
+
+    actual = batch.stats()["counts"]
+    expected = rows.stats()["counts"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert batch.stats()["tokens"] == 500
+
+
+def test_fast_paths():
+    # Spellings the grammar rejects never enter the accept set
+    iso = ChordIsolator(char_threshold=4, accept_table=["Am", "Cmaj7", "Hm"])
+
+    actual = iso._accept
+    expected = {"Am"}
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    # Charset rejects are not cached, brackets still go through the regex
+    iso = ChordIsolator(accept_table=[])
+    actual = iso.raw_chord_isolation("Amx Bridge C(x) Am")
+    expected = "C(x) Am"
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert "Amx" not in iso._cached_tokens
+
+
+def test_accept_table_roundtrip(tmp_path):
+    path = tmp_path / "common_chords.txt"
+    texts = pd.Series(["Am G Am lyrics", "C Am Hm"])
+
+    actual = build_accept_table(texts, path=path, top_n=2)
+    expected = ["Am", "G"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert load_accept_table(path) == tuple(expected)
+
+
+def test_accept_table_seed(tmp_path):
+    path = tmp_path / "common_chords.txt"
+    texts = pd.Series(["Am G Am lyrics"])
+
+    actual = build_accept_table(texts, path=path, top_n=2, seed=["G", "C"])
+    expected = ["G", "C", "Am"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    # The shipped table starts with the diatonic chords of every root
+    assert load_accept_table()[: len(seed_chords())] == tuple(seed_chords())
+    assert {"C", "Em", "Bb", "Am7", "G7"} <= ChordIsolator()._accept
+
+
+def test_charset_follows_grammar():
+    class HalfDiminishedIsolator(ChordIsolator):
+        QUALITIES = ChordIsolator.QUALITIES + ("ø",)
+
+    iso = HalfDiminishedIsolator(accept_table=[])
+
+    actual = iso.raw_chord_isolation("Bø7 Bx7")
+    expected = "Bø7"
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_stats_disabled():
+    with pytest.raises(RuntimeError):
+        ChordIsolator().stats()
@@ -0,0 +1,83 @@
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordtable import ChordTable
+from chordal_wip.encoded import EncodedCorpus
+import numpy as np
+import pytest
+
+
+def exported(path):
+    cc = ChordCanonizer()
+    cc.canonicalize("Am G lyrics Ebmaj7add9/G C+7")
+    return cc.export_table(path)
+
+
+def test_export_columns(tmp_path):
+    table = exported(tmp_path / "table").to_frame()
+
+    actual = table.set_index("raw").loc["Ebmaj7add9/G"].to_dict()
+    expected = {
+        "canonical": "Eb(q:maj)(m:add9)(e:7)/G",
+        "root": "Eb",
+        "quality": "maj",
+        "adds": "add9",
+        "sus": "",
+        "dominant": False,
+        "extensions": "7",
+        "alterations": "",
+        "slash": "G",
+        "unclear": "",
+    }
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert table["raw"].tolist() == sorted(table["raw"])
+
+
+def test_load_memory_mapped(tmp_path):
+    exported(tmp_path / "table")
+    table = ChordTable.load(tmp_path / "table")
+
+    assert isinstance(table.columns["raw"], np.memmap)
+
+    actual = table.lookup(["G", "Dm", "lyrics"]).tolist()
+    expected = ["G(q:maj)", None, "X"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_join_encoded(tmp_path):
+    exported(tmp_path / "table")
+    table = ChordTable.load(tmp_path / "table")
+    corpus = EncodedCorpus.from_strings(["Am G", "Dm C+7"])
+
+    actual = table.join_encoded(corpus, column="root", missing="").to_strings()
+    expected = ["A G", " C"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_import_table(tmp_path):
+    exported(tmp_path / "table")
+
+    warm = ChordCanonizer()
+    n_loaded = warm.import_table(tmp_path / "table")
+
+    actual = dict(warm._cached_chords.items())
+
+    assert n_loaded == 5
+    assert actual["Am"] == "A(q:m)" and actual["lyrics"] is False
+
+    class MinorCanonizer(ChordCanonizer):
+        ALLOWED_QUALITIES = {**ChordCanonizer.ALLOWED_QUALITIES, "mi": "m"}
+
+    assert MinorCanonizer().import_table(tmp_path / "table") == 0
+
+
+def test_parquet_roundtrip(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "table.parquet"
+    exported(path)
+
+    actual = ChordTable.load(path).lookup(["Am", "Dm"]).tolist()
+    expected = ["A(q:m)", None]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
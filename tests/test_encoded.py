@@ -0,0 +1,54 @@
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordisolator import ChordIsolator
+from chordal_wip.encoded import EncodedCorpus
+import numpy as np
+import pandas as pd
+
+SONGS = pd.Series(["Am C (Am Bridge", "", "G,D7 lyrics Am", "Em A|-3-|"])
+
+
+def test_from_token_lists():
+    corpus = EncodedCorpus.from_token_lists([["Am", "C"], [], ["C", "G"]])
+
+    assert corpus.vocab == ["Am", "C", "G"]
+    assert corpus.ids.tolist() == [0, 1, 1, 2]
+    assert corpus.offsets.tolist() == [0, 2, 2, 4]
+    assert corpus.ids.dtype == np.int32
+    assert corpus.tokens(2) == ["C", "G"]
+
+
+def test_isolate_encoded():
+    iso = ChordIsolator()
+    corpus = iso.isolate_encoded(SONGS)
+
+    actual = corpus.to_strings()
+    expected = SONGS.apply(ChordIsolator().raw_chord_isolation).tolist()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    # "(Am" and "Am" are interned into one vocabulary entry
+    assert corpus.vocab.count("Am") == 1
+    assert corpus.token_counts()["Am"] == 3
+
+
+def test_isolate_encoded_fused():
+    iso = ChordIsolator(engine="fused")
+
+    actual = iso.isolate_encoded(SONGS).to_strings()
+    expected = SONGS.apply(ChordIsolator().raw_chord_isolation).tolist()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_canonicalize_encoded():
+    corpus = EncodedCorpus.from_strings(["Am Amin C", "lyrics", "CM G7"])
+
+    canonical = ChordCanonizer().canonicalize_encoded(corpus)
+
+    actual = canonical.to_strings()
+    expected = [
+        ChordCanonizer().canonicalize(txt) for txt in corpus.to_strings()
+    ]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert len(canonical.vocab) == 4
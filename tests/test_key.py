@@ -1,5 +1,15 @@
-from chordal_wip.scales import get_ref_scales
-from chordal_wip.key import KeyPredictor
+from chordal_wip.scales import MODES, get_compiled_ref_scales, get_ref_scales
+from chordal_wip.key import (
+    KeyModel,
+    KeyPredictor,
+    find_keys,
+    pitch_class_profiles,
+    predict_keys,
+)
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
 import pytest
 
 
@@ -32,3 +42,160 @@ def test_come_together_beatles_key_prediction():
     assert actual_key == expected_key, (
         f"Expected {expected_key}, got {actual_key}"
     )
+
+
+def test_compiled_ref_scales():
+    reference = get_ref_scales()
+    compiled = get_compiled_ref_scales(reference)
+
+    row = compiled.weights[0]
+    actual = {c: row[i] for c, i in compiled.chord_index.items() if row[i]}
+    expected = reference["chord_weights"][0]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert compiled.weights.dtype == np.float32
+    assert get_compiled_ref_scales() is compiled
+
+    with pytest.raises(ValueError):
+        compiled.weights[0, 0] = 1
+
+
+def test_key_prediction_keeps_reference():
+    reference = get_ref_scales()
+    columns = reference.columns.tolist()
+
+    KeyPredictor("Am Dm E", reference)
+
+    actual = reference.columns.tolist()
+    expected = columns
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_predict_keys():
+    songs = pd.Series(
+        [
+            "Cmaj Gmaj Amin Fmaj Cmaj Fmaj",
+            "Amin Dmin Emaj Amin",
+            "C/E",
+            "",
+        ]
+    )
+    reference = get_ref_scales()
+
+    predictions = predict_keys(songs, block_size=2)
+
+    actual = list(zip(predictions.keys, predictions.modes))
+    expected = [
+        tuple(KeyPredictor(txt, reference).top_scale) for txt in songs[:2]
+    ] + [("", ""), ("", "")]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert np.isnan(predictions.scores[2:]).all()
+
+
+def test_pitch_class_profiles():
+    songs = pd.Series(["Cmaj Amin", "A(q:m)/C X"])
+
+    actual = pitch_class_profiles(songs).tolist()
+    expected = [
+        [2, 0, 0, 0, 2, 0, 0, 1, 0, 1, 0, 0],
+        [1, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0],
+    ]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    actual = pitch_class_profiles(songs, profile="root")[0].nonzero()[0]
+    expected = [0, 9]
+
+    assert actual.tolist() == expected, f"Expected {expected}, got {actual}"
+
+    with pytest.raises(ValueError):
+        pitch_class_profiles(songs, profile="bass")
+
+
+def test_pitch_class_profiles_blocks():
+    songs = pd.Series(["Cmaj Amin", "", "A(q:m)/C X", "X", "G(d:True)(e:7) C"])
+
+    actual = pitch_class_profiles(songs, block_size=2).tolist()
+    expected = pitch_class_profiles(songs).tolist()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_find_keys():
+    songs = pd.Series(
+        [
+            "Cmaj Gmaj Am Fmaj Cmaj Fmaj Cmaj Fmaj Cmaj Gmaj Am Fmaj",
+            "Db Gb Ab Db",
+            "C#(q:maj) F#(q:maj) G#(q:maj) C#(q:maj)",
+            "X",
+        ]
+    )
+
+    predictions = find_keys(songs)
+
+    actual = list(zip(predictions.keys, predictions.modes))
+    expected = [("C", "ionian"), ("C#", "ionian"), ("C#", "ionian"), ("", "")]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert predictions.scores[1] == predictions.scores[2]
+
+
+def test_key_prediction_7ths():
+    progression = "Cmaj7 Dmin7 G7 Cmaj7"
+    reference = get_ref_scales(modes=MODES, chord_type="7ths")
+
+    actual = tuple(KeyPredictor(progression, reference).top_scale)
+    expected = ("C", "ionian")
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    predictions = find_keys(
+        pd.Series([progression]), modes=MODES, chord_type="7ths"
+    )
+    actual = (predictions.keys[0], predictions.modes[0])
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_key_model():
+    reference = get_ref_scales()
+    model = KeyModel.fit(reference)
+    progressions = ["Cmaj Gmaj Amin Fmaj", "Amin Dmin Emaj Amin C/E"]
+
+    actual = [model.predict(txt)[:2] for txt in progressions]
+    expected = [
+        tuple(KeyPredictor(txt, reference).top_scale) for txt in progressions
+    ]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert model.predict(["Amin", "Dmin", "Emaj", "Amin"])[:2] == expected[1]
+    assert model.predict("C/E")[:2] == ("", "")
+    assert model.predict("")[:2] == ("", "")
+
+
+def test_key_model_save_load(tmp_path):
+    path = tmp_path / "key_model.npz"
+    model = KeyModel.fit(modes=MODES, chord_type="7ths")
+    model.save(path)
+
+    actual = KeyModel.load(path).predict("Cmaj7 Dmin7 G7 Cmaj7")
+    expected = model.predict("Cmaj7 Dmin7 G7 Cmaj7")
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_key_import_is_light():
+    code = "import sys, chordal_wip.key; print('pandas' in sys.modules, 'pytest' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    actual = result.stdout.strip()
+    expected = "False False"
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
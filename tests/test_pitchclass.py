@@ -0,0 +1,77 @@
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.chordparts import ChordParts
+from chordal_wip.pitchclass import (
+    get_pitch_class_table,
+    mask_notes,
+    transpose,
+)
+from chordal_wip.scales import Chord
+import numpy as np
+import pytest
+
+cc = ChordCanonizer()
+table = get_pitch_class_table()
+
+
+def pc(chord: str):
+    return table.lookup(cc._canonicalize_chord(chord))
+
+
+def test_chord_formulas():
+    for suffix, formula in Chord.CHORD_FORMULAS.items():
+        chord = "C" + suffix.replace("♭", "b").replace("♯", "#")
+
+        actual = pc(chord)
+        expected = (0, 0, sum(1 << (i % 12) for i in set(formula)))
+
+        assert actual == expected, (
+            f"{chord}: Expected {expected}, got {actual}"
+        )
+
+
+def test_pitch_classes():
+    actual = mask_notes(pc("Ebmaj7add9/G")[2])
+    expected = ["D", "D#", "F", "G", "A#"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert pc("Ebmaj7add9/G")[:2] == (3, 7)
+
+
+def test_enharmonic_spellings():
+    actual = pc("Dbm7")
+    expected = pc("C#m7")
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_transpose():
+    c, g = pc("C7")[2], pc("G7")[2]
+
+    assert transpose(c, 7) == g
+    assert transpose(g, -7) == c
+
+    masks = table.encode(["C", "G"])[:, 2]
+    actual = transpose(masks, 2).tolist()
+    expected = [pc("D")[2], pc("A")[2]]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_encode():
+    actual = table.encode(["A(q:m)", "X", "Em13"])
+    expected = np.array([pc("Am"), (-1, -1, -1), pc("Em13")], dtype=np.int16)
+
+    assert actual.dtype == np.int16
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_from_canonical():
+    chord = "Eb(q:maj)(m:add9)(e:7)/G"
+
+    actual = ChordParts.from_canonical(chord)
+    expected = cc._normalize(cc._decompose("Ebmaj7add9/G"))
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+    with pytest.raises(ValueError):
+        ChordParts.from_canonical("Em13")
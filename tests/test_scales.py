@@ -1,5 +1,11 @@
 import numpy as np
-from chordal_wip.scales import Scale
+from chordal_wip.scales import (
+    MODES,
+    Scale,
+    get_compiled_ref_scales,
+    get_ref_scales,
+)
+import pytest
 
 
 def test_C_ionian_scale_generation():
@@ -31,3 +37,50 @@ def test_F_myxolydian_scale_generation():
     assert np.array_equal(scale.notes, expected_notes), (
         f"Expected {expected_notes}, got {scale.notes}"
     )
+
+
+def test_ref_scales_configurations():
+    reference = get_ref_scales(modes=MODES, chord_type="7ths")
+
+    actual = reference.loc[0, "chord_weights"]
+    expected = {
+        "Cmaj7": 2,
+        "Dmin7": 1,
+        "Emin7": 1,
+        "Fmaj7": 1,
+        "G7": 1,
+        "Amin7": 1,
+        "Bmin7♭5": 1,
+    }
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert len(reference) == 12 * len(MODES)
+    assert get_ref_scales(modes=list(MODES), chord_type="7ths") is reference
+    assert get_ref_scales() is not reference
+
+    compiled = get_compiled_ref_scales(modes=MODES, chord_type="7ths")
+    assert compiled is get_compiled_ref_scales(reference)
+    assert compiled.weights.shape == (84, 48)
+
+
+def test_compiled_ref_scales_of_custom_frame():
+    reference = get_ref_scales().copy()
+    compiled = get_compiled_ref_scales(reference)
+
+    # Not cached, so a changed frame is never scored with stale weights
+    reference["chord_weights"] = [{"C": 5}, *reference["chord_weights"][1:]]
+
+    actual = get_compiled_ref_scales(reference).weights[0].max()
+    expected = 5
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert compiled.weights[0].max() == 2
+
+
+def test_ref_scales_invalid_configurations():
+    with pytest.raises(ValueError):
+        get_ref_scales(modes=("ionian", "blues"))
+    with pytest.raises(ValueError):
+        get_ref_scales(chord_type="9ths")
+    with pytest.raises(ValueError):
+        get_ref_scales(weights=(2, 1, 1))
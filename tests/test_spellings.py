@@ -0,0 +1,87 @@
+import gzip
+import json
+from chordal_wip import spellings
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.spellings import load_spelling_table, table_fingerprint
+
+cc = ChordCanonizer()
+
+
+def parsed(chord: str) -> str:
+    return cc._reconstruct(cc._normalize(cc._decompose(chord)))
+
+
+def test_spelled_matches_parser():
+    test = [
+        "Am",
+        "C#m7b5",
+        "Ebmaj7add9",
+        "Gsus4",
+        "Bb7/D",
+        "F#dim7",
+        "Cadd9/E",
+    ]
+
+    actual = [cc._spelled(chord) for chord in test]
+    expected = [parsed(chord) for chord in test]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_spelled_misses():
+    # Unseen suffixes, brackets and non-note basses fall back to the parser
+    test = ["Cmaj7(b9)", "C/9b", "C/G7", "Cxyz", "lyrics"]
+
+    actual = [cc._spelled(chord) for chord in test]
+    expected = [None] * len(test)
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_shipped_table_is_current():
+    with gzip.open(ChordCanonizer.SPELLING_TABLE_PATH, "rt") as f:
+        actual = json.load(f)["fingerprint"]
+    expected = table_fingerprint(cc)
+
+    assert actual == expected, (
+        "Stale spelling table, run `python -m chordal_wip build-spellings`"
+    )
+
+
+def test_rebuilt_on_rule_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(spellings, "SPELLING_CACHE_DIR", tmp_path)
+    shipped = ChordCanonizer.SPELLING_TABLE_PATH.read_bytes()
+
+    # Keeps the shipped table path, which must not be overwritten
+    class MinorCanonizer(ChordCanonizer):
+        ALLOWED_QUALITIES = {**ChordCanonizer.ALLOWED_QUALITIES, "mi": "m"}
+
+    table = load_spelling_table(MinorCanonizer())
+
+    (path,) = tmp_path.glob("spellings-*.json.gz")
+    with gzip.open(path, "rt") as f:
+        actual = json.load(f)["fingerprint"]
+    expected = table_fingerprint(MinorCanonizer())
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert "mi7" in table and "mi7" not in load_spelling_table(cc)
+    assert ChordCanonizer.SPELLING_TABLE_PATH.read_bytes() == shipped
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_unreadable_table_is_stale(tmp_path, monkeypatch):
+    monkeypatch.setattr(spellings, "SPELLING_CACHE_DIR", tmp_path / "cache")
+    path = tmp_path / "spellings.json.gz"
+
+    # Half-written by another process
+    data = ChordCanonizer.SPELLING_TABLE_PATH.read_bytes()
+    path.write_bytes(data[: len(data) // 2])
+
+    class TruncatedCanonizer(ChordCanonizer):
+        SPELLING_TABLE_PATH = path
+
+    actual = load_spelling_table(TruncatedCanonizer())
+    expected = spellings.build_spelling_table(cc)
+
+    assert actual == expected, "Expected the rebuilt table"
+    assert path.read_bytes() == data[: len(data) // 2]
@@ -0,0 +1,170 @@
+from chordal_wip.__main__ import main
+from chordal_wip.chordisolator import ChordIsolator
+from chordal_wip.stream import isolate_file, read_chunks
+import pandas as pd
+import pytest
+
+SONGS = pd.DataFrame(
+    {
+        "title": ["a", "b", "c", "d", "e"],
+        "chords_str": [
+            "Am C Bridge",
+            None,
+            "G,D7sus4 lyrics",
+            "Em A|-3-|",
+            "F",
+        ],
+    }
+)
+
+
+def expected_output():
+    texts = SONGS["chords_str"].fillna("")
+    return texts.apply(ChordIsolator().raw_chord_isolation).tolist()
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv"])
+def test_isolate_file(tmp_path, suffix):
+    input_path = tmp_path / f"songs{suffix}"
+    output_path = tmp_path / f"clean{suffix}"
+
+    if suffix == ".csv":
+        SONGS.to_csv(input_path, index=False)
+    else:
+        SONGS.to_json(input_path, orient="records", lines=True)
+
+    n_rows = isolate_file(input_path, output_path, chunksize=2)
+    result = pd.concat(read_chunks(output_path, chunksize=2))
+
+    actual = result["chords_str_clean"].fillna("").tolist()
+    expected = expected_output()
+
+    assert n_rows == 5
+    assert result["title"].tolist() == SONGS["title"].tolist()
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_isolate_file_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    input_path = tmp_path / "songs.parquet"
+    output_path = tmp_path / "clean.parquet"
+    SONGS.to_parquet(input_path)
+
+    isolate_file(input_path, output_path, chunksize=2)
+
+    actual = pd.read_parquet(output_path)["chords_str_clean"].tolist()
+    expected = expected_output()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_isolate_file_parquet_schema(tmp_path):
+    pytest.importorskip("pyarrow")
+    input_path = tmp_path / "songs.jsonl"
+    output_path = tmp_path / "clean.parquet"
+
+    # No type can be inferred for "artist" from the first chunk
+    songs = SONGS.assign(artist=[None, None, "x", "y", None])
+    songs.to_json(input_path, orient="records", lines=True)
+
+    isolate_file(input_path, output_path, chunksize=2)
+    result = pd.read_parquet(output_path)
+
+    actual = result["artist"].fillna("").tolist()
+    expected = ["", "", "x", "y", ""]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert result["chords_str_clean"].fillna("").tolist() == expected_output()
+
+
+def test_cli_isolate(tmp_path):
+    input_path = tmp_path / "songs.jsonl"
+    output_path = tmp_path / "clean.jsonl"
+    cache_path = tmp_path / "cache.sqlite"
+    SONGS.to_json(input_path, orient="records", lines=True)
+
+    main(
+        [
+            "isolate",
+            str(input_path),
+            str(output_path),
+            "--chunksize",
+            "2",
+            "--engine",
+            "fused",
+            "--cache",
+            str(cache_path),
+        ]
+    )
+
+    result = pd.read_json(output_path, lines=True)
+
+    actual = result["chords_str_clean"].fillna("").tolist()
+    expected = expected_output()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert ChordIsolator().load_cache(cache_path) > 0
+
+
+class CountingIsolator(ChordIsolator):
+    pools = 0
+
+    def process_pool(self, workers=None):
+        CountingIsolator.pools += 1
+        return super().process_pool(workers)
+
+
+def test_isolate_file_workers(tmp_path):
+    input_path = tmp_path / "songs.jsonl"
+    output_path = tmp_path / "clean.jsonl"
+    SONGS.to_json(input_path, orient="records", lines=True)
+
+    isolator = CountingIsolator()
+    isolate_file(
+        input_path, output_path, chunksize=2, isolator=isolator, workers=2
+    )
+    result = pd.read_json(output_path, lines=True)
+
+    actual = result["chords_str_clean"].fillna("").tolist()
+    expected = expected_output()
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert CountingIsolator.pools == 1
+    assert len(isolator._cached_tokens) > 0
+
+
+def test_cli_bounded_cache(tmp_path, monkeypatch):
+    input_path = tmp_path / "songs.jsonl"
+    output_path = tmp_path / "clean.jsonl"
+    SONGS.to_json(input_path, orient="records", lines=True)
+
+    caches = []
+    init = ChordIsolator.__init__
+
+    def spy(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        caches.append(self._cached_tokens)
+
+    monkeypatch.setattr(ChordIsolator, "__init__", spy)
+    main(
+        [
+            "isolate",
+            str(input_path),
+            str(output_path),
+            "--cache-entries",
+            "3",
+            "--cache-policy",
+            "slru",
+        ]
+    )
+
+    actual = (type(caches[0]).__name__, caches[0].max_entries)
+    expected = ("SLRUCache", 3)
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert len(caches[0]) <= 3
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        list(read_chunks(tmp_path / "songs.txt"))
@@ -0,0 +1,75 @@
+import json
+from chordal_wip.chordcanonizer import ChordCanonizer
+from chordal_wip.key import KeyPredictor
+from chordal_wip.scales import get_ref_scales
+from chordal_wip.trace import Tracer
+import pytest
+
+
+def test_canonizer_silent_by_default(capsys):
+    ChordCanonizer().canonicalize("Ebmaj7add9/G E13- lyrics")
+
+    actual = capsys.readouterr().out
+    expected = ""
+
+    assert actual == expected, f"Expected {expected!r}, got {actual!r}"
+
+
+def test_canonizer_trace_callback():
+    events = []
+    cc = ChordCanonizer(tracer=Tracer(events.append))
+    cc.canonicalize("Ebmaj7add9/G Ebmaj7add9/G")
+
+    # Memo hits are not traced
+    actual = events
+    expected = [
+        {
+            "event": "decompose",
+            "chord": "Ebmaj7add9",
+            "slash_bass_candidate": "G",
+            "remainder": "maj7add9",
+            "tokens": ["maj", "7", "add9"],
+        },
+        {
+            "event": "canonicalize",
+            "chord": "Ebmaj7add9/G",
+            "edge_case": False,
+            "canonical": "Eb(q:maj)(m:add9)(e:7)/G",
+        },
+    ]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_trace_sampling_to_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+
+    with Tracer(str(path), sample=2) as tracer:
+        ChordCanonizer(tracer=tracer).canonicalize("Am G C lyrics")
+
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+
+    # Chords 1 and 3 of 4 are sampled
+    actual = [e["chord"] for e in events if e["event"] == "canonicalize"]
+    expected = ["Am", "C"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+
+
+def test_key_trace():
+    events = []
+    KeyPredictor(
+        "Cmaj Gmaj Am", get_ref_scales(), tracer=Tracer(events.append)
+    )
+
+    actual = [e["event"] for e in events]
+    expected = ["key_scores"]
+
+    assert actual == expected, f"Expected {expected}, got {actual}"
+    assert len(events[0]["scores"]) == len(get_ref_scales())
+
+
+def test_invalid_sample():
+    with pytest.raises(ValueError):
+        Tracer(print, sample=0)